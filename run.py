@@ -8,7 +8,15 @@ Interface de linha de comando para executar as principais funcionalidades do pro
 Usage:
     python run.py --help
     python run.py collect-data
+    python run.py download-data [--workers N]
     python run.py process-data
+    python run.py shard-data --shards N
+    python run.py process-shard --shard I
+    python run.py merge-shards
+    python run.py process-sharded --shards N [--verify]
+    python run.py build-features
+    python run.py benchmark-features [--rows N]
+    python run.py build-aggregates [--force]
     python run.py analyze-data
     python run.py run-all
 """
@@ -23,6 +31,10 @@ sys.path.append('src')
 
 from data.collect_data import DataCollector
 from data.process_data import DataProcessor, process_all_data
+from data.aggregates import AggregateBuilder
+from data.sharding import (partition_data, process_shard, merge_shards,
+                           run_sharded_locally, verify_against_single_node)
+from features.transaction_features import build_transaction_features, benchmark_transaction_features
 
 def collect_data():
     """Coleta e organiza os dados de exemplo."""
@@ -51,6 +63,30 @@ def collect_data():
     print("\n📝 Para datasets completos, consulte:")
     print(collector.get_dataset_instructions())
 
+def download_data(workers=8):
+    """Baixa e extrai os datasets completos (download paralelo e retomável)."""
+    print("⬇️ Iniciando download dos datasets completos...")
+    
+    collector = DataCollector()
+    datasets = collector.download_datasets_info()
+    
+    for name, info in datasets.items():
+        print(f"\n📋 {info['name']} ({info['size']})")
+        try:
+            result = collector.download_dataset(name, workers=workers)
+        except Exception as e:
+            print(f"❌ Falha no download: {e}")
+            print("Execute novamente para retomar a partir do último arquivo extraído.")
+            continue
+        
+        print(f"   ✅ {result['members']} arquivos processados")
+        if result['resumed']:
+            print("   🔁 Download retomado")
+        if result['sha256_verified']:
+            print("   🔒 SHA-256 verificado")
+    
+    print("\n📁 Arquivos extraídos em data/raw/")
+
 def process_data():
     """Processa e limpa os dados coletados."""
     print("🔄 Iniciando processamento de dados...")
@@ -73,46 +109,172 @@ def process_data():
         print("❌ Dados brutos não encontrados.")
         print("Execute primeiro: python run.py collect-data")
 
+def shard_data(n_shards):
+    """Particiona clientes e transações em shards por hash de customer_id."""
+    print(f"🧩 Particionando dados em {n_shards} shards...")
+    
+    try:
+        partition = partition_data(n_shards)
+    except FileNotFoundError:
+        print("❌ Dados brutos não encontrados.")
+        print("Execute primeiro: python run.py collect-data")
+        return
+    
+    print(f"\n✅ Partição criada em data/shards/")
+    for shard, (customers, transactions) in enumerate(zip(partition['customer_rows'],
+                                                          partition['transaction_rows'])):
+        print(f"   📦 shard-{shard:03d}: {customers} clientes, {transactions} transações")
+
+def run_shard(shard):
+    """Processa um único shard (um worker)."""
+    print(f"⚙️ Processando shard {shard}...")
+    
+    try:
+        process_shard(shard)
+    except FileNotFoundError:
+        print("❌ Partição não encontrada.")
+        print("Execute primeiro: python run.py shard-data --shards N")
+        return
+    
+    print(f"✅ Shard {shard} processado")
+
+def merge_shard_outputs():
+    """Combina as saídas dos shards em data/processed/."""
+    print("🔗 Combinando saídas dos shards...")
+    
+    try:
+        customers = merge_shards()
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        print("Execute os workers: python run.py process-shard --shard I")
+        return
+    
+    print(f"\n✅ {len(customers)} clientes combinados")
+    print("📁 Arquivos gerados em data/processed/")
+
+def process_sharded(n_shards, verify=False):
+    """Executa o modo particionado localmente com N processos worker."""
+    print(f"🧩 Processamento particionado com {n_shards} workers...")
+    
+    try:
+        customers = run_sharded_locally(n_shards)
+    except FileNotFoundError:
+        print("❌ Dados brutos não encontrados.")
+        print("Execute primeiro: python run.py collect-data")
+        return
+    
+    print(f"\n✅ {len(customers)} clientes processados em {n_shards} shards")
+    
+    if verify:
+        print("\n🔍 Comparando com a execução em um único nó:")
+        for name, identical in verify_against_single_node().items():
+            status = "✅ idêntico" if identical else "❌ diferente"
+            print(f"   {name}: {status}")
+
+def build_features():
+    """Calcula features de transações (RFM e janelas de compra) dos clientes."""
+    print("🧮 Calculando features de transações...")
+    
+    customers = build_transaction_features()
+    if customers is None:
+        print("❌ Dados de transações ou clientes processados não encontrados.")
+        print("Execute primeiro: python run.py collect-data && python run.py process-data")
+        return
+    
+    print(f"\n✅ Features adicionadas a {len(customers)} clientes")
+    print("📁 Tabela atualizada: data/processed/hm_customers_clean.csv")
+
+def benchmark_features(rows=None):
+    """Mede o tempo de cálculo das features de transações."""
+    print("⏱️ Executando benchmark das features de transações...")
+    
+    kwargs = {} if rows is None else {'n_transactions': rows}
+    results = benchmark_transaction_features(**kwargs)
+    
+    print(f"\n📊 Resultado do benchmark:")
+    print(f"   🧾 Transações: {int(results['transactions'])}")
+    print(f"   👥 Clientes: {int(results['customers'])}")
+    print(f"   ⏱️ Tempo: {results['seconds']:.2f}s (leitura {results['load_seconds']:.2f}s, "
+          f"features {results['features_seconds']:.2f}s, gravação {results['save_seconds']:.2f}s)")
+    print(f"   🚀 Throughput: {results['transactions_per_second'] / 1e6:.1f}M transações/s")
+    if 'time_budget' in results:
+        status = "✅ dentro" if results['seconds'] <= results['time_budget'] else "❌ fora"
+        print(f"   🎯 Orçamento: {results['time_budget']:.2f}s ({status} do orçamento)")
+
+def build_aggregates_stage(force=False):
+    """Materializa as tabelas agregadas da análise exploratória."""
+    print("🧱 Construindo tabelas agregadas...")
+    
+    builder = AggregateBuilder()
+    if not builder.processor.load_manifest():
+        print("❌ Manifesto de dados processados não encontrado.")
+        print("Execute primeiro: python run.py process-data")
+        return
+    
+    if not force and not builder.is_stale():
+        print("✅ Tabelas agregadas já estão atualizadas.")
+        return
+    
+    aggregates = builder.build_aggregates()
+    print(f"\n✅ Tabelas agregadas ({len(aggregates)}):")
+    for name, table in aggregates.items():
+        print(f"   📄 {name} ({len(table)} linhas)")
+    print(f"📁 Arquivos gerados em {builder.aggregates_dir}/")
+
 def analyze_data():
-    """Executa análise básica dos dados."""
+    """Executa análise básica dos dados a partir das tabelas agregadas."""
     print("📊 Iniciando análise de dados...")
     
-    try:
-        import pandas as pd
-        
-        # Carregar dados híbridos
-        hybrid_path = "data/processed/hybrid_dataset.csv"
-        if not os.path.exists(hybrid_path):
-            print("❌ Dataset híbrido não encontrado.")
-            print("Execute primeiro: python run.py process-data")
-            return
-        
-        df = pd.read_csv(hybrid_path)
-        
-        print(f"\n📋 Dataset Híbrido - {len(df)} registros:")
-        print(f"   👥 Clientes únicos: {df['customer_id'].nunique()}")
-        print(f"   👔 Produtos únicos: {df['article_id'].nunique()}")
-        
+    builder = AggregateBuilder()
+    if not builder.processor.load_manifest():
+        print("❌ Dados processados não encontrados.")
+        print("Execute primeiro: python run.py process-data")
+        return
+    
+    # Reconstrói os agregados apenas se o manifesto mudou
+    aggregates = builder.load_aggregates()
+    
+    if 'age_distribution' in aggregates:
+        ages = aggregates['age_distribution']
+        total = ages['customers'].sum()
+        mean_age = (ages['age'] * ages['customers']).sum() / total
+        print(f"\n👥 Clientes: {total}")
+        print(f"   Idade média: {mean_age:.1f} anos")
+        print(f"   Faixa etária: {ages['age'].min()} - {ages['age'].max()} anos")
+    
+    if 'age_imputation_counts' in aggregates:
+        imputed = aggregates['age_imputation_counts'].set_index('age_source')['customers']
+        print(f"   Idades imputadas (fora da distribuição): {imputed.get('imputed', 0)}")
+    
+    if 'product_category_counts' in aggregates:
         print(f"\n📊 Distribuição por categoria:")
-        category_counts = df['product_category'].value_counts()
-        for category, count in category_counts.items():
-            percentage = (count / len(df)) * 100
-            print(f"   {category}: {count} ({percentage:.1f}%)")
-        
-        print(f"\n📏 Distribuição de tamanhos:")
-        size_counts = df['size_recommendation'].value_counts()
-        for size, count in size_counts.items():
-            percentage = (count / len(df)) * 100
-            print(f"   Tamanho {size}: {count} ({percentage:.1f}%)")
-        
+        for _, row in aggregates['product_category_counts'].iterrows():
+            print(f"   {row['product_category']}: {row['count']} ({row['percentage']:.1f}%)")
+    
+    if 'color_category_counts' in aggregates:
+        print(f"\n🎨 Distribuição por cor:")
+        for _, row in aggregates['color_category_counts'].iterrows():
+            print(f"   {row['color_category']}: {row['count']} ({row['percentage']:.1f}%)")
+    
+    if 'fit_rating_counts' in aggregates:
         print(f"\n✅ Distribuição de caimento:")
-        fit_counts = df['predicted_fit'].value_counts()
-        for fit, count in fit_counts.items():
-            percentage = (count / len(df)) * 100
-            print(f"   {fit.title()}: {count} ({percentage:.1f}%)")
-            
-    except ImportError:
-        print("❌ Pandas não encontrado. Instale com: pip install pandas")
+        for _, row in aggregates['fit_rating_counts'].iterrows():
+            print(f"   {row['fit_rating'].title()}: {row['count']} ({row['percentage']:.1f}%)")
+    
+    for name, group, label in [('fit_rates_by_size', 'size_ordered', 'tamanho'),
+                               ('fit_rates_by_bmi', 'bmi_category', 'categoria de BMI')]:
+        if name in aggregates:
+            print(f"\n📏 Taxa de caimento perfeito por {label}:")
+            rates = aggregates[name]
+            perfect = rates[rates['fit_rating'] == 'perfect'].set_index(group)['rate']
+            for value in rates[group].unique():
+                print(f"   {value}: {perfect.get(value, 0) * 100:.1f}%")
+    
+    if 'purchases_over_time' in aggregates:
+        weekly = aggregates['purchases_over_time']
+        print(f"\n🛒 Compras por semana ({len(weekly)} semanas):")
+        for _, row in weekly.tail(4).iterrows():
+            print(f"   {row['t_dat'].date()}: {row['purchases']}")
 
 def run_all():
     """Executa todo o pipeline completo."""
@@ -124,7 +286,13 @@ def run_all():
     print("\n2️⃣ Processamento de dados:")
     process_data()
     
-    print("\n3️⃣ Análise de dados:")
+    print("\n3️⃣ Features de transações:")
+    build_features()
+    
+    print("\n4️⃣ Tabelas agregadas:")
+    build_aggregates_stage()
+    
+    print("\n5️⃣ Análise de dados:")
     analyze_data()
     
     print("\n🎉 Pipeline completo executado com sucesso!")
@@ -137,7 +305,12 @@ def main():
         epilog="""
 Exemplos de uso:
   python run.py collect-data     # Coleta dados de exemplo
+  python run.py download-data    # Baixa datasets completos do Kaggle
   python run.py process-data     # Processa e limpa dados
+  python run.py process-sharded --shards 4 --verify  # Processamento particionado local
+  python run.py build-features   # Calcula features de transações (RFM)
+  python run.py benchmark-features --rows 1000000  # Benchmark das features
+  python run.py build-aggregates # Materializa tabelas agregadas da EDA
   python run.py analyze-data     # Análise básica dos dados
   python run.py run-all          # Executa pipeline completo
 
@@ -148,10 +321,53 @@ Para análise detalhada:
     
     parser.add_argument(
         'command', 
-        choices=['collect-data', 'process-data', 'analyze-data', 'run-all'],
+        choices=['collect-data', 'download-data', 'process-data',
+                 'shard-data', 'process-shard', 'merge-shards', 'process-sharded',
+                 'build-features',
+                 'benchmark-features', 'build-aggregates', 'analyze-data', 'run-all'],
         help='Comando a ser executado'
     )
     
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=None,
+        help='Número de transações sintéticas do benchmark (padrão: histórico completo H&M)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='Número de requisições simultâneas no download (padrão: 8)'
+    )
+    
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=4,
+        help='Número de shards no modo particionado (padrão: 4)'
+    )
+    
+    parser.add_argument(
+        '--shard',
+        type=int,
+        default=0,
+        help='Índice do shard processado por process-shard'
+    )
+    
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Compara o resultado particionado com a execução em um único nó'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Reconstrói as tabelas agregadas mesmo sem mudanças no manifesto'
+    )
+    
     args = parser.parse_args()
     
     # Garantir que diretórios existem
@@ -160,8 +376,24 @@ Para análise detalhada:
     
     if args.command == 'collect-data':
         collect_data()
+    elif args.command == 'download-data':
+        download_data(args.workers)
     elif args.command == 'process-data':
         process_data()
+    elif args.command == 'shard-data':
+        shard_data(args.shards)
+    elif args.command == 'process-shard':
+        run_shard(args.shard)
+    elif args.command == 'merge-shards':
+        merge_shard_outputs()
+    elif args.command == 'process-sharded':
+        process_sharded(args.shards, args.verify)
+    elif args.command == 'build-features':
+        build_features()
+    elif args.command == 'benchmark-features':
+        benchmark_features(args.rows)
+    elif args.command == 'build-aggregates':
+        build_aggregates_stage(args.force)
     elif args.command == 'analyze-data':
         analyze_data()
     elif args.command == 'run-all':
@@ -7,5 +7,11 @@ Módulo de dados para coleta e processamento.
 
 from .collect_data import DataCollector
 from .process_data import DataProcessor, process_all_data
+from .aggregates import AggregateBuilder, build_aggregates
+from .acquisition import ArchiveAcquirer, ParallelDownloader, ChecksumError
+from .sharding import partition_data, process_shard, merge_shards, run_sharded_locally
 
-__all__ = ['DataCollector', 'DataProcessor', 'process_all_data']
\ No newline at end of file
+__all__ = ['DataCollector', 'DataProcessor', 'process_all_data',
+           'AggregateBuilder', 'build_aggregates',
+           'ArchiveAcquirer', 'ParallelDownloader', 'ChecksumError',
+           'partition_data', 'process_shard', 'merge_shards', 'run_sharded_locally']
\ No newline at end of file
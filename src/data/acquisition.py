@@ -0,0 +1,778 @@
+"""
+Consultor de Estilo Virtual - Dataset Acquisition Module
+=======================================================
+
+Este módulo implementa o download dos arquivos compactados dos datasets
+(H&M ~31GB e Rent the Runway) com requisições HTTP Range em paralelo sobre
+um pool de conexões, descompactando o ZIP em fluxo diretamente para o
+diretório de destino, sem gravar uma cópia completa do arquivo em disco.
+
+Características:
+- Blocos baixados em paralelo e consumidos em ordem (memória limitada)
+- Com filtro de membros, lê o diretório central no fim do arquivo e baixa
+  apenas os intervalos de bytes dos membros selecionados
+- Retomada a partir do último membro do ZIP extraído por completo
+- Verificação do CRC-32 de cada membro e do SHA-256 do arquivo
+- Servidores sem suporte a Range são lidos em uma única conexão
+"""
+
+import os
+import json
+import struct
+import zlib
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Assinaturas do formato ZIP
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+CENTRAL_DIRECTORY_SIGNATURE = b'PK\x01\x02'
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = b'PK\x05\x06'
+ZIP64_END_SIGNATURE = b'PK\x06\x06'
+ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+
+# Tamanho máximo do fim do arquivo com o diretório central: registro final
+# (22 bytes), comentário (até 64KB) e localizador ZIP64 (20 bytes)
+END_OF_ARCHIVE_MAX_SIZE = 22 + 0xFFFF + 20
+
+# Padrões de download
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 8
+
+
+class ChecksumError(ValueError):
+    """Erro levantado quando um checksum não confere."""
+
+
+class ParallelDownloader:
+    """
+    Classe responsável por baixar arquivos grandes com requisições Range em paralelo.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_inflight: Optional[int] = None,
+                 auth: Optional[tuple] = None,
+                 timeout: float = 60.0):
+        """
+        Inicializa o downloader.
+
+        Args:
+            workers: Número de requisições simultâneas (tamanho do pool de conexões)
+            chunk_size: Tamanho de cada requisição Range em bytes
+            max_inflight: Blocos em andamento/buffer (padrão: 2 x workers)
+            auth: Credenciais HTTP (usuário, chave), ex.: API do Kaggle. São
+                enviadas apenas ao host das URLs passadas a probe(), nunca ao
+                destino de um redirecionamento (ex.: URL assinada do storage)
+            timeout: Timeout de cada requisição em segundos
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_inflight = max_inflight or 2 * workers
+        self.timeout = timeout
+
+        # Pool de conexões reutilizadas entre as threads, com novas tentativas
+        retry = Retry(total=5, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=['HEAD', 'GET'])
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.auth = auth
+        self._auth_hosts = set()
+
+    def probe(self, url: str) -> Dict[str, Any]:
+        """
+        Consulta tamanho, suporte a Range e ETag do arquivo remoto.
+
+        Args:
+            url: URL do arquivo (redirecionamentos são seguidos)
+
+        Returns:
+            Dict com url final, size, accept_ranges e etag
+        """
+        # O requests remove a credencial ao seguir um redirecionamento para outro host
+        self._auth_hosts.add(urlsplit(url).netloc)
+        response = self.session.head(url, allow_redirects=True, auth=self._auth_for(url),
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+        size = response.headers.get('Content-Length')
+        return {
+            'url': response.url,
+            'size': int(size) if size is not None else None,
+            'accept_ranges': response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+            'etag': response.headers.get('ETag')
+        }
+
+    def iter_chunks(self, url: str, start: int = 0,
+                    size: Optional[int] = None,
+                    accept_ranges: bool = True,
+                    end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Baixa o arquivo a partir de start e entrega os blocos em ordem.
+
+        Os blocos são buscados em paralelo, mas no máximo max_inflight ficam
+        em memória, de modo que o consumo é em fluxo.
+
+        Args:
+            url: URL do arquivo
+            start: Posição inicial em bytes
+            size: Tamanho total do arquivo (necessário para Range)
+            accept_ranges: Se o servidor aceita requisições Range
+            end: Posição final exclusiva (padrão: size)
+
+        Yields:
+            Blocos de bytes em ordem
+        """
+        if not accept_ranges or size is None:
+            if start or end is not None:
+                raise ValueError("Servidor não aceita Range; não é possível baixar um intervalo.")
+            yield from self._iter_single_stream(url)
+            return
+
+        end = size if end is None else min(end, size)
+        ranges = ((pos, min(pos + self.chunk_size, end) - 1)
+                  for pos in range(start, end, self.chunk_size))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque(pool.submit(self._fetch_range, url, first, last)
+                            for first, last in _take(ranges, self.max_inflight))
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    for first, last in _take(ranges, 1):
+                        pending.append(pool.submit(self._fetch_range, url, first, last))
+                    yield data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch(self, url: str, start: int, end: int, size: int) -> bytes:
+        """
+        Baixa um intervalo de bytes [start, end) inteiro para a memória.
+
+        Args:
+            url: URL do arquivo
+            start: Posição inicial em bytes
+            end: Posição final exclusiva
+            size: Tamanho total do arquivo
+
+        Returns:
+            Bytes do intervalo
+        """
+        return b''.join(self.iter_chunks(url, start, size, end=end))
+
+    def _fetch_range(self, url: str, first: int, last: int, attempts: int = 3) -> bytes:
+        """Baixa um intervalo de bytes, repetindo em caso de resposta incompleta."""
+        expected = last - first + 1
+        for attempt in range(1, attempts + 1):
+            response = self.session.get(url, headers={'Range': f'bytes={first}-{last}'},
+                                        auth=self._auth_for(url), timeout=self.timeout)
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ValueError(f"Servidor ignorou o Range bytes={first}-{last} (HTTP {response.status_code})")
+
+            data = response.content
+            if len(data) == expected:
+                return data
+            logger.warning(f"Bloco incompleto em {first} ({len(data)}/{expected} bytes), "
+                           f"tentativa {attempt}/{attempts}")
+
+        raise IOError(f"Falha ao baixar bytes {first}-{last} de {url}")
+
+    def _auth_for(self, url: str) -> Optional[tuple]:
+        """Credenciais para url, apenas se o host for o de uma URL consultada."""
+        if self.auth is not None and urlsplit(url).netloc in self._auth_hosts:
+            return self.auth
+        return None
+
+    def _iter_single_stream(self, url: str) -> Iterator[bytes]:
+        """Baixa o arquivo em uma única conexão (servidores sem Range)."""
+        with self.session.get(url, stream=True, auth=self._auth_for(url),
+                              timeout=self.timeout) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=self.chunk_size)
+
+
+class _ByteStream:
+    """Leitor sequencial sobre um iterador de blocos, com posição e SHA-256."""
+
+    def __init__(self, chunks: Iterator[bytes], offset: int = 0):
+        self._chunks = chunks
+        self._buffer = b''
+        self._pos = 0
+        self.offset = offset
+        self.sha256 = hashlib.sha256()
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self.sha256.update(chunk)
+                self._buffer, self._pos = chunk, 0
+                return True
+        return False
+
+    def read(self, n: int) -> bytes:
+        """Lê exatamente n bytes (menos apenas no fim do fluxo)."""
+        parts = []
+        while n > 0:
+            if self._pos >= len(self._buffer) and not self._fill():
+                break
+            part = self._buffer[self._pos:self._pos + n]
+            self._pos += len(part)
+            n -= len(part)
+            parts.append(part)
+
+        data = b''.join(parts)
+        self.offset += len(data)
+        return data
+
+    def read_some(self, max_n: int) -> bytes:
+        """Lê até max_n bytes já disponíveis (ou do próximo bloco)."""
+        if self._pos >= len(self._buffer) and not self._fill():
+            return b''
+        data = self._buffer[self._pos:self._pos + max_n]
+        self._pos += len(data)
+        self.offset += len(data)
+        return data
+
+    def unread(self, data: bytes) -> None:
+        """Devolve bytes lidos a mais para o início do buffer."""
+        if data:
+            self._buffer = data + self._buffer[self._pos:]
+            self._pos = 0
+            self.offset -= len(data)
+
+    def drain(self) -> None:
+        """Consome o restante do fluxo (para completar o SHA-256)."""
+        self.offset += len(self._buffer) - self._pos
+        self._buffer, self._pos = b'', 0
+        while self._fill():
+            self.offset += len(self._buffer)
+            self._buffer, self._pos = b'', 0
+
+
+class StreamingZipExtractor:
+    """
+    Classe responsável por extrair um ZIP em fluxo, membro a membro.
+
+    Lê os cabeçalhos locais em sequência (sem depender do diretório central
+    no fim do arquivo), suportando membros armazenados ou deflate, data
+    descriptors e ZIP64.
+    """
+
+    def __init__(self, target_dir: str,
+                 include: Optional[Callable[[str], bool]] = None,
+                 defer_commit: bool = False,
+                 pending: Optional[List[str]] = None):
+        """
+        Inicializa o extrator.
+
+        Args:
+            target_dir: Diretório onde os membros serão extraídos
+            include: Filtro de membros a gravar (os demais são apenas validados)
+            defer_commit: Manter os membros como .partial até commit() (ex.: até
+                o SHA-256 do arquivo ser verificado)
+            pending: Membros já extraídos e ainda não confirmados
+        """
+        self.target_dir = target_dir
+        self.include = include
+        self.defer_commit = defer_commit
+        self.pending = list(pending or [])
+
+    def extract(self, stream: _ByteStream,
+                on_member: Optional[Callable[[str, int], None]] = None) -> int:
+        """
+        Extrai membros do fluxo até o diretório central.
+
+        Args:
+            stream: Fluxo posicionado no cabeçalho local de um membro
+            on_member: Chamado com (nome, offset do próximo membro) após cada extração
+
+        Returns:
+            Número de membros extraídos
+        """
+        extracted = 0
+
+        while True:
+            signature = stream.read(4)
+            if signature in (b'', CENTRAL_DIRECTORY_SIGNATURE,
+                             END_OF_CENTRAL_DIRECTORY_SIGNATURE, ZIP64_END_SIGNATURE):
+                return extracted
+            if signature != LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"Cabeçalho ZIP inválido no offset {stream.offset - 4}")
+
+            name = self._extract_member(stream)
+            extracted += 1
+            if on_member is not None:
+                on_member(name, stream.offset)
+
+    def _extract_member(self, stream: _ByteStream) -> str:
+        """Extrai um membro a partir do seu cabeçalho local."""
+        (_, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = struct.unpack('<HHHHHIIIHH', stream.read(26))
+        raw_name = stream.read(name_length)
+        extra = stream.read(extra_length)
+        name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+
+        if flags & 0x1:
+            raise ValueError(f"Membro criptografado não suportado: {name}")
+        if method not in (0, 8):
+            raise ValueError(f"Método de compressão não suportado ({method}): {name}")
+
+        zip64 = compressed_size == 0xFFFFFFFF or size == 0xFFFFFFFF
+        if zip64:
+            size, compressed_size = self._read_zip64_sizes(extra, size, compressed_size)
+
+        has_descriptor = bool(flags & 0x8)
+
+        path = self._safe_path(name)
+        selected = self.include is None or self.include(name)
+        if name.endswith('/'):
+            if selected:
+                os.makedirs(path, exist_ok=True)
+            return name
+
+        # Gravar em arquivo temporário e renomear após validar o CRC-32
+        partial_path = f"{path}.partial"
+        if selected:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        output = open(partial_path, 'wb') if selected else None
+        written, actual_crc = 0, 0
+        try:
+            for data in self._iter_member_data(stream, method, compressed_size,
+                                               known_size=not has_descriptor or compressed_size > 0,
+                                               zip64=zip64):
+                if output is not None:
+                    output.write(data)
+                written += len(data)
+                actual_crc = zlib.crc32(data, actual_crc)
+        finally:
+            if output is not None:
+                output.close()
+
+        if has_descriptor:
+            crc, size = self._read_data_descriptor(stream, zip64)
+
+        if actual_crc != crc or written != size:
+            if selected:
+                os.remove(partial_path)
+            raise ChecksumError(f"CRC-32/tamanho não confere para {name}")
+
+        if selected and self.defer_commit:
+            self.pending.append(name)
+        elif selected:
+            os.replace(partial_path, path)
+        return name
+
+    def commit(self) -> None:
+        """Move os membros pendentes de .partial para o destino final."""
+        for name in self.pending:
+            path = self._safe_path(name)
+            if os.path.exists(f"{path}.partial"):
+                os.replace(f"{path}.partial", path)
+        self.pending = []
+
+    def discard(self) -> None:
+        """Remove os membros pendentes sem alterar os arquivos existentes."""
+        for name in self.pending:
+            partial_path = f"{self._safe_path(name)}.partial"
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        self.pending = []
+
+    def _iter_member_data(self, stream: _ByteStream, method: int,
+                          compressed_size: int, known_size: bool,
+                          zip64: bool = False) -> Iterator[bytes]:
+        """Entrega os bytes descompactados de um membro."""
+        if method == 0 and not known_size:
+            yield from self._iter_stored_until_descriptor(stream, zip64)
+            return
+
+        if method == 0:
+            remaining = compressed_size
+            while remaining > 0:
+                data = stream.read_some(remaining)
+                if not data:
+                    raise IOError("Fim inesperado do arquivo ZIP")
+                remaining -= len(data)
+                yield data
+            return
+
+        decompressor = zlib.decompressobj(-15)
+        remaining = compressed_size if known_size else None
+        while not decompressor.eof:
+            data = stream.read_some(remaining if remaining is not None else DEFAULT_CHUNK_SIZE)
+            if not data:
+                raise IOError("Fim inesperado do arquivo ZIP")
+            if remaining is not None:
+                remaining -= len(data)
+            yield decompressor.decompress(data)
+
+        # Bytes lidos além do fim do fluxo deflate pertencem ao próximo registro
+        stream.unread(decompressor.unused_data)
+
+    def _iter_stored_until_descriptor(self, stream: _ByteStream, zip64: bool) -> Iterator[bytes]:
+        """
+        Entrega um membro armazenado de tamanho desconhecido.
+
+        O fim é localizado pela assinatura do data descriptor cujo CRC-32 e
+        tamanho conferem com os bytes lidos até ali.
+        """
+        descriptor_length = 4 + (20 if zip64 else 12)
+        pending, crc, total = b'', 0, 0
+
+        while True:
+            data = stream.read_some(DEFAULT_CHUNK_SIZE)
+            if not data:
+                raise IOError("Fim inesperado do arquivo ZIP")
+            pending += data
+
+            # Procurar um descriptor válido entre as assinaturas candidatas
+            unresolved = None
+            index = pending.find(DATA_DESCRIPTOR_SIGNATURE)
+            while index != -1:
+                if index + descriptor_length > len(pending):
+                    unresolved = index
+                    break
+                fields = pending[index + 4:index + descriptor_length]
+                expected_crc = struct.unpack('<I', fields[:4])[0]
+                expected_size = struct.unpack('<Q' if zip64 else '<I', fields[-8:] if zip64 else fields[-4:])[0]
+                if (expected_size == total + index
+                        and expected_crc == zlib.crc32(pending[:index], crc)):
+                    yield pending[:index]
+                    stream.unread(pending[index:])
+                    return
+                index = pending.find(DATA_DESCRIPTOR_SIGNATURE, index + 1)
+
+            # Entregar o que não pode conter o início de um descriptor
+            safe = len(pending) - (descriptor_length - 1)
+            if unresolved is not None:
+                safe = min(safe, unresolved)
+            if safe > 0:
+                crc = zlib.crc32(pending[:safe], crc)
+                total += safe
+                yield pending[:safe]
+                pending = pending[safe:]
+
+    def _read_data_descriptor(self, stream: _ByteStream, zip64: bool) -> tuple:
+        """Lê o data descriptor (assinatura opcional) após os dados do membro."""
+        data = stream.read(4)
+        if data == DATA_DESCRIPTOR_SIGNATURE:
+            data = stream.read(4)
+        crc = struct.unpack('<I', data)[0]
+
+        if zip64:
+            _, size = struct.unpack('<QQ', stream.read(16))
+        else:
+            _, size = struct.unpack('<II', stream.read(8))
+        return crc, size
+
+    def _read_zip64_sizes(self, extra: bytes, size: int, compressed_size: int) -> tuple:
+        """Lê os tamanhos de 64 bits do campo extra ZIP64."""
+        pos = 0
+        while pos + 4 <= len(extra):
+            header_id, length = struct.unpack('<HH', extra[pos:pos + 4])
+            if header_id == 0x0001:
+                values = extra[pos + 4:pos + 4 + length]
+                offset = 0
+                if size == 0xFFFFFFFF:
+                    size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                    offset += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                return size, compressed_size
+            pos += 4 + length
+
+        raise ValueError("Campo extra ZIP64 ausente")
+
+    def _safe_path(self, name: str) -> str:
+        """Resolve o caminho de destino, impedindo escrita fora de target_dir."""
+        root = os.path.abspath(self.target_dir)
+        path = os.path.abspath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Caminho inválido no arquivo ZIP: {name}")
+        return path
+
+
+class ArchiveAcquirer:
+    """
+    Classe responsável por baixar e extrair um arquivo ZIP remoto com retomada.
+    """
+
+    def __init__(self, downloader: Optional[ParallelDownloader] = None):
+        """
+        Inicializa o responsável pela aquisição.
+
+        Args:
+            downloader: Downloader a ser usado (padrão: ParallelDownloader())
+        """
+        self.downloader = downloader or ParallelDownloader()
+
+    def acquire(self, url: str, target_dir: str,
+                sha256: Optional[str] = None,
+                include: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+        """
+        Baixa o arquivo de url e extrai em fluxo para target_dir.
+
+        Com um filtro de membros (include), sem SHA-256 e com suporte a Range,
+        apenas o diretório central e os membros selecionados são baixados (ex.:
+        os CSVs da H&M, sem as imagens). Caso contrário, o arquivo inteiro é
+        lido em fluxo: o SHA-256 do arquivo exige todos os bytes.
+
+        O progresso é salvo após cada membro extraído; uma nova chamada
+        retoma a partir do próximo membro. O SHA-256 do arquivo só pode ser
+        verificado quando o download é feito do início; em retomadas, a
+        integridade é garantida pelo CRC-32 de cada membro.
+
+        Quando o SHA-256 é verificado, os membros ficam como .partial até o
+        fim do download e só substituem os arquivos existentes se o checksum
+        conferir; caso contrário, são removidos.
+
+        Args:
+            url: URL do arquivo ZIP
+            target_dir: Diretório de destino (ex.: data/raw/hm)
+            sha256: SHA-256 esperado do arquivo completo (opcional)
+            include: Filtro de membros a gravar (padrão: todos)
+
+        Returns:
+            Dict com o resultado (membros extraídos, bytes, checksum verificado)
+        """
+        os.makedirs(target_dir, exist_ok=True)
+        state_path = os.path.join(target_dir, '.download_state.json')
+
+        remote = self.downloader.probe(url)
+        selective = (include is not None and not sha256
+                     and remote['accept_ranges'] and remote['size'] is not None)
+        mode = 'selective' if selective else 'stream'
+
+        state = self._load_state(state_path, url, remote, mode)
+        if state.get('complete'):
+            logger.info(f"Arquivo já extraído em {target_dir}")
+            return {'members': 0, 'bytes': 0, 'resumed': False, 'sha256_verified': None}
+
+        if selective:
+            result = self._acquire_selected(remote, target_dir, include, state, state_path)
+        else:
+            if include is not None and sha256:
+                logger.info("SHA-256 configurado: o arquivo inteiro é baixado para verificá-lo.")
+            result = self._acquire_stream(remote, target_dir, sha256, include, state, state_path)
+
+        state['complete'] = True
+        self._save_state(state_path, state)
+
+        logger.info(f"{result['members']} membros extraídos em {target_dir}")
+        return result
+
+    def read_central_directory(self, url: str, size: int) -> List[Dict[str, Any]]:
+        """
+        Lê o diretório central do ZIP remoto com requisições Range.
+
+        Args:
+            url: URL do arquivo ZIP
+            size: Tamanho total do arquivo
+
+        Returns:
+            Lista de membros (name, offset, compressed_size), ordenada por offset
+        """
+        tail_start = max(0, size - END_OF_ARCHIVE_MAX_SIZE)
+        tail = self.downloader.fetch(url, tail_start, size, size)
+
+        index = tail.rfind(END_OF_CENTRAL_DIRECTORY_SIGNATURE)
+        if index == -1:
+            raise ValueError("Diretório central do ZIP não encontrado")
+        entries, directory_size, directory_offset = struct.unpack('<HII', tail[index + 10:index + 20])
+
+        # ZIP64: contagem, tamanho e offset ficam no registro final ZIP64
+        if entries == 0xFFFF or 0xFFFFFFFF in (directory_size, directory_offset):
+            locator = tail[index - 20:index]
+            if locator[:4] != ZIP64_LOCATOR_SIGNATURE:
+                raise ValueError("Localizador ZIP64 não encontrado")
+            record_offset = struct.unpack('<Q', locator[8:16])[0]
+            record = self.downloader.fetch(url, record_offset, record_offset + 56, size)
+            if record[:4] != ZIP64_END_SIGNATURE:
+                raise ValueError("Registro final ZIP64 inválido")
+            entries, directory_size, directory_offset = struct.unpack('<QQQ', record[32:56])
+
+        directory_end = directory_offset + directory_size
+        if directory_offset >= tail_start:
+            directory = tail[directory_offset - tail_start:directory_end - tail_start]
+        else:
+            directory = self.downloader.fetch(url, directory_offset, directory_end, size)
+
+        members = []
+        pos = 0
+        for _ in range(entries):
+            if directory[pos:pos + 4] != CENTRAL_DIRECTORY_SIGNATURE:
+                raise ValueError(f"Entrada inválida no diretório central ({pos})")
+            (_, _, _, flags, _, _, _, _, compressed_size, member_size, name_length, extra_length,
+             comment_length, _, _, _, offset) = struct.unpack('<4sHHHHHHIIIHHHHHII', directory[pos:pos + 46])
+            raw_name = directory[pos + 46:pos + 46 + name_length]
+            extra = directory[pos + 46 + name_length:pos + 46 + name_length + extra_length]
+
+            if 0xFFFFFFFF in (compressed_size, member_size, offset):
+                compressed_size, offset = self._read_zip64_entry(extra, member_size,
+                                                                 compressed_size, offset)
+
+            members.append({'name': raw_name.decode('utf-8' if flags & 0x800 else 'cp437'),
+                            'offset': offset, 'compressed_size': compressed_size})
+            pos += 46 + name_length + extra_length + comment_length
+
+        members.sort(key=lambda member: member['offset'])
+
+        # Cada membro ocupa os bytes até o próximo cabeçalho local (ou o diretório)
+        for member, following in zip(members, members[1:] + [{'offset': directory_offset}]):
+            member['end'] = following['offset']
+
+        return members
+
+    def _acquire_stream(self, remote: Dict[str, Any], target_dir: str,
+                        sha256: Optional[str], include: Optional[Callable[[str], bool]],
+                        state: Dict[str, Any], state_path: str) -> Dict[str, Any]:
+        """Baixa o arquivo inteiro em fluxo, retomando a partir do offset salvo."""
+        url = state['url']
+        start = state.get('offset', 0)
+        if start:
+            logger.info(f"Retomando download de {url} a partir do byte {start} "
+                        f"({len(state.get('completed', []))} membros já extraídos)")
+        else:
+            logger.info(f"Baixando {url} ({remote['size'] or '?'} bytes) para {target_dir}")
+
+        # Com SHA-256 verificável, nada substitui os arquivos antes do checksum
+        extractor = StreamingZipExtractor(target_dir, include,
+                                          defer_commit=bool(sha256) and start == 0,
+                                          pending=state.get('pending'))
+
+        def checkpoint(name: str, offset: int) -> None:
+            state['offset'] = offset
+            state.setdefault('completed', []).append(name)
+            state['pending'] = extractor.pending
+            self._save_state(state_path, state)
+
+        stream = _ByteStream(self.downloader.iter_chunks(remote['url'], start, remote['size'],
+                                                         remote['accept_ranges']), offset=start)
+        members = extractor.extract(stream, on_member=checkpoint)
+        stream.drain()
+
+        # SHA-256 só cobre o arquivo inteiro quando o fluxo começou do byte 0
+        verified = None
+        if sha256 and start == 0:
+            digest = stream.sha256.hexdigest()
+            verified = digest == sha256.lower()
+            if not verified:
+                extractor.discard()
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                raise ChecksumError(f"SHA-256 não confere para {url}: {digest}")
+        elif sha256:
+            logger.warning("Download retomado: SHA-256 do arquivo não verificável; "
+                           "membros validados por CRC-32.")
+
+        extractor.commit()
+        state['pending'] = []
+
+        return {'members': members, 'bytes': stream.offset - start,
+                'resumed': start > 0, 'sha256_verified': verified}
+
+    def _acquire_selected(self, remote: Dict[str, Any], target_dir: str,
+                          include: Callable[[str], bool],
+                          state: Dict[str, Any], state_path: str) -> Dict[str, Any]:
+        """Baixa apenas os membros selecionados, pelos offsets do diretório central."""
+        url, size = remote['url'], remote['size']
+        completed = state.setdefault('completed', [])
+        resumed = bool(completed)
+
+        selected = [member for member in self.read_central_directory(url, size)
+                    if include(member['name']) and not member['name'].endswith('/')
+                    and member['name'] not in completed]
+        total = sum(member['end'] - member['offset'] for member in selected)
+        if resumed:
+            logger.info(f"Retomando download de {state['url']} "
+                        f"({len(completed)} membros já extraídos)")
+        logger.info(f"Baixando {len(selected)} membros ({total} de {size} bytes) para {target_dir}")
+
+        extractor = StreamingZipExtractor(target_dir, include)
+        downloaded = 0
+        for member in selected:
+            stream = _ByteStream(self.downloader.iter_chunks(url, member['offset'], size,
+                                                             end=member['end']),
+                                 offset=member['offset'])
+            extractor.extract(stream)
+            downloaded += stream.offset - member['offset']
+
+            completed.append(member['name'])
+            self._save_state(state_path, state)
+
+        return {'members': len(selected), 'bytes': downloaded,
+                'resumed': resumed, 'sha256_verified': None}
+
+    def _read_zip64_entry(self, extra: bytes, size: int, compressed_size: int,
+                          offset: int) -> tuple:
+        """Lê tamanho comprimido e offset de 64 bits de uma entrada do diretório central."""
+        pos = 0
+        while pos + 4 <= len(extra):
+            header_id, length = struct.unpack('<HH', extra[pos:pos + 4])
+            if header_id == 0x0001:
+                values = extra[pos + 4:pos + 4 + length]
+                field = 0
+                if size == 0xFFFFFFFF:
+                    field += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = struct.unpack('<Q', values[field:field + 8])[0]
+                    field += 8
+                if offset == 0xFFFFFFFF:
+                    offset = struct.unpack('<Q', values[field:field + 8])[0]
+                return compressed_size, offset
+            pos += 4 + length
+
+        raise ValueError("Campo extra ZIP64 ausente")
+
+    def _load_state(self, state_path: str, url: str, remote: Dict[str, Any],
+                    mode: str = 'stream') -> Dict[str, Any]:
+        """Carrega o progresso salvo, descartando-o se o arquivo remoto ou o modo mudou."""
+        fresh = {'url': url, 'size': remote['size'], 'etag': remote['etag'], 'mode': mode}
+        if not os.path.exists(state_path):
+            return fresh
+
+        with open(state_path) as f:
+            state = json.load(f)
+
+        if any(state.get(key) != value for key, value in fresh.items()):
+            logger.warning("Arquivo remoto ou modo de download mudou desde o último download; reiniciando.")
+            return fresh
+        if state.get('offset') and not remote['accept_ranges']:
+            logger.warning("Servidor não aceita Range; reiniciando download.")
+            return fresh
+
+        return state
+
+    def _save_state(self, state_path: str, state: Dict[str, Any]) -> None:
+        """Grava o progresso de forma atômica."""
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, state_path)
+
+
+def _take(iterator: Iterator, n: int) -> list:
+    """Retorna até n itens do iterador."""
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) >= n:
+            break
+    return items
@@ -0,0 +1,256 @@
+"""
+Consultor de Estilo Virtual - EDA Aggregates Module
+==================================================
+
+Este módulo materializa as tabelas agregadas usadas na análise exploratória
+(distribuição de idades, contagens de categorias e de perfis de clientes, taxas
+de caimento e compras ao longo do tempo) a partir das saídas Parquet processadas.
+
+As tabelas são pequenas e só são recalculadas quando o manifesto das saídas
+processadas (manifest.json) muda, de modo que notebooks e análises abrem
+instantaneamente mesmo com os datasets completos.
+"""
+
+import pandas as pd
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+from .process_data import DataProcessor
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Informações de construção das tabelas agregadas
+BUILD_INFO_FILENAME = "build_info.json"
+
+# Versão das definições dos agregados (incrementar ao alterar as tabelas)
+AGGREGATES_VERSION = 3
+
+# Saídas processadas das quais as tabelas agregadas dependem
+UPSTREAM_TABLES = ['hm_customers_clean', 'hm_articles_clean', 'fit_data_clean', 'hm_daily_purchases']
+
+
+class AggregateBuilder:
+    """
+    Classe responsável por construir e carregar as tabelas agregadas da EDA.
+    """
+
+    def __init__(self, processed_dir: str = "data/processed",
+                 aggregates_dir: Optional[str] = None):
+        """
+        Inicializa o construtor de agregados.
+
+        Args:
+            processed_dir: Diretório com os dados processados
+            aggregates_dir: Diretório das tabelas agregadas (padrão: processed_dir/aggregates)
+        """
+        self.processed_dir = processed_dir
+        self.aggregates_dir = aggregates_dir or f"{processed_dir}/aggregates"
+        self.processor = DataProcessor(processed_dir)
+
+    def upstream_fingerprint(self) -> str:
+        """
+        Calcula a impressão digital das entradas do manifesto usadas nos agregados.
+
+        Returns:
+            SHA-256 das entradas relevantes do manifesto
+        """
+        manifest = self.processor.load_manifest()
+        upstream = {name: manifest[name].get('files') for name in UPSTREAM_TABLES if name in manifest}
+        payload = json.dumps(upstream, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def load_build_info(self) -> Dict[str, Any]:
+        """Carrega as informações da última construção dos agregados."""
+        build_info_path = f"{self.aggregates_dir}/{BUILD_INFO_FILENAME}"
+        if not os.path.exists(build_info_path):
+            return {}
+
+        with open(build_info_path) as f:
+            return json.load(f)
+
+    def is_stale(self) -> bool:
+        """
+        Verifica se as tabelas agregadas precisam ser reconstruídas.
+
+        Returns:
+            True se não existem agregados ou se o manifesto mudou
+        """
+        build_info = self.load_build_info()
+        if build_info.get('version') != AGGREGATES_VERSION:
+            return True
+
+        missing = [name for name in build_info.get('tables', [])
+                   if not os.path.exists(f"{self.aggregates_dir}/{name}.csv")]
+        if missing:
+            return True
+
+        return build_info.get('upstream_fingerprint') != self.upstream_fingerprint()
+
+    def build_aggregates(self) -> Dict[str, pd.DataFrame]:
+        """
+        Calcula todas as tabelas agregadas e grava em aggregates_dir.
+
+        Returns:
+            Dict com o nome e o DataFrame de cada tabela agregada
+        """
+        logger.info("Construindo tabelas agregadas da EDA...")
+
+        aggregates = {}
+
+        customer_columns = ['club_member_status', 'fashion_news_frequency']
+        customers = self._read_processed('hm_customers_clean',
+                                         ['age', 'age_group', 'age_imputed'] + customer_columns)
+        if customers is not None and 'age_imputed' in customers.columns:
+            # Idades imputadas com a mediana ficam fora da distribuição e dos grupos
+            imputed = customers['age_imputed'].astype(bool)
+            aggregates['age_imputation_counts'] = self.age_imputation_counts(imputed)
+            customers['age'] = customers['age'].mask(imputed)
+            if 'age_group' in customers.columns:
+                customers['age_group'] = customers['age_group'].mask(imputed, 'Unknown')
+        if customers is not None and 'age' in customers.columns:
+            aggregates['age_distribution'] = self.age_distribution(customers)
+        if customers is not None and 'age_group' in customers.columns:
+            aggregates['age_group_counts'] = self.value_counts(customers, 'age_group')
+        for column in customer_columns:
+            if customers is not None and column in customers.columns:
+                aggregates[f'{column}_counts'] = self.value_counts(customers, column)
+
+        article_columns = ['product_type_name', 'product_group_name', 'product_category',
+                           'colour_group_name', 'color_category']
+        articles = self._read_processed('hm_articles_clean', article_columns)
+        for column in article_columns:
+            if articles is not None and column in articles.columns:
+                name = column.replace('_name', '')
+                aggregates[f'{name}_counts'] = self.value_counts(articles, column)
+
+        fit_groups = {'size_ordered': 'size', 'bmi_category': 'bmi',
+                      'body_type': 'body_type', 'category': 'category'}
+        fit = self._read_processed('fit_data_clean', ['fit_rating'] + list(fit_groups))
+        if fit is not None and 'fit_rating' in fit.columns:
+            aggregates['fit_rating_counts'] = self.value_counts(fit, 'fit_rating')
+            for column, name in fit_groups.items():
+                if column in fit.columns:
+                    aggregates[f'fit_rates_by_{name}'] = self.fit_rates(fit, column)
+
+        daily = self._read_processed('hm_daily_purchases', ['t_dat', 'purchases'])
+        if daily is not None:
+            aggregates['purchases_over_time'] = self.purchases_over_time(daily)
+
+        # Gravar tabelas e a impressão digital do manifesto usado
+        os.makedirs(self.aggregates_dir, exist_ok=True)
+        for name, df in aggregates.items():
+            df.to_csv(f"{self.aggregates_dir}/{name}.csv", index=False)
+
+        build_info = {
+            'version': AGGREGATES_VERSION,
+            'upstream_fingerprint': self.upstream_fingerprint(),
+            'tables': sorted(aggregates),
+            'built_at': datetime.now().isoformat(timespec='seconds')
+        }
+        with open(f"{self.aggregates_dir}/{BUILD_INFO_FILENAME}", 'w') as f:
+            json.dump(build_info, f, indent=2)
+
+        logger.info(f"Tabelas agregadas salvas em {self.aggregates_dir}: {len(aggregates)} tabelas")
+        return aggregates
+
+    def load_aggregates(self, rebuild_if_stale: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        Carrega as tabelas agregadas, reconstruindo-as se o manifesto mudou.
+
+        Args:
+            rebuild_if_stale: Reconstruir quando os agregados estiverem desatualizados
+
+        Returns:
+            Dict com o nome e o DataFrame de cada tabela agregada
+        """
+        if rebuild_if_stale and self.is_stale():
+            return self.build_aggregates()
+
+        aggregates = {}
+        for name in self.load_build_info().get('tables', []):
+            parse_dates = ['t_dat'] if name == 'purchases_over_time' else None
+            aggregates[name] = pd.read_csv(f"{self.aggregates_dir}/{name}.csv", parse_dates=parse_dates)
+
+        return aggregates
+
+    def age_distribution(self, customers_df: pd.DataFrame) -> pd.DataFrame:
+        """Conta clientes por idade (em anos inteiros)."""
+        ages = customers_df['age'].dropna().round().astype(int)
+        counts = ages.value_counts().sort_index()
+        return pd.DataFrame({'age': counts.index, 'customers': counts.to_numpy()})
+
+    def age_imputation_counts(self, imputed: pd.Series) -> pd.DataFrame:
+        """Conta clientes com idade informada e com idade imputada."""
+        return pd.DataFrame({'age_source': ['observed', 'imputed'],
+                             'customers': [int((~imputed).sum()), int(imputed.sum())]})
+
+    def value_counts(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
+        """Conta ocorrências de cada valor de uma coluna, com percentual."""
+        counts = df[column].fillna('Unknown').value_counts()
+        return pd.DataFrame({
+            column: counts.index,
+            'count': counts.to_numpy(),
+            'percentage': counts.to_numpy() / max(counts.sum(), 1) * 100
+        })
+
+    def fit_rates(self, fit_df: pd.DataFrame, group_column: str) -> pd.DataFrame:
+        """Calcula a taxa de cada avaliação de caimento dentro de cada grupo."""
+        df = fit_df.dropna(subset=[group_column, 'fit_rating'])
+        counts = df.groupby([group_column, 'fit_rating']).size().rename('count').reset_index()
+        counts['rate'] = counts['count'] / counts.groupby(group_column)['count'].transform('sum')
+        return counts
+
+    def purchases_over_time(self, daily_df: pd.DataFrame) -> pd.DataFrame:
+        """Agrega as compras diárias por semana."""
+        daily = daily_df.assign(t_dat=pd.to_datetime(daily_df['t_dat']))
+        weekly = daily.set_index('t_dat')['purchases'].resample('W').sum()
+        return weekly.rename_axis('t_dat').reset_index()
+
+    def _read_processed(self, filename: str, columns: List[str]) -> Optional[pd.DataFrame]:
+        """Lê apenas as colunas necessárias (quando existirem) de uma saída processada."""
+        parquet_path = f"{self.processed_dir}/{filename}.parquet"
+        csv_path = f"{self.processed_dir}/{filename}.csv"
+
+        if os.path.exists(parquet_path):
+            try:
+                import pyarrow.parquet as pq
+                available = pq.read_schema(parquet_path).names
+                return pd.read_parquet(parquet_path, columns=[col for col in columns if col in available])
+            except Exception as e:
+                logger.warning(f"Erro ao ler Parquet, usando CSV: {e}")
+
+        try:
+            return pd.read_csv(csv_path, usecols=lambda col: col in columns,
+                               keep_default_na=False, na_values=[''])
+
+        except FileNotFoundError:
+            logger.warning(f"Saída processada não encontrada: {filename}")
+            return None
+
+
+def build_aggregates(processed_data_dir: str = "data/processed",
+                     force: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    Função principal para construir as tabelas agregadas da EDA.
+
+    Args:
+        processed_data_dir: Diretório com dados processados
+        force: Reconstruir mesmo que o manifesto não tenha mudado
+
+    Returns:
+        Dict com o nome e o DataFrame de cada tabela agregada
+    """
+    builder = AggregateBuilder(processed_data_dir)
+
+    if force or builder.is_stale():
+        return builder.build_aggregates()
+
+    logger.info("Tabelas agregadas atualizadas; nada a reconstruir.")
+    return builder.load_aggregates(rebuild_if_stale=False)
+
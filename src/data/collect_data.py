@@ -13,8 +13,8 @@ Datasets utilizados:
 import pandas as pd
 import numpy as np
 import os
-import requests
-from typing import Dict, List, Optional, Tuple
+import json
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
 # Configurar logging
@@ -53,6 +53,9 @@ class DataCollector:
             "hm_fashion": {
                 "name": "H&M Personalized Fashion Recommendations",
                 "url": "https://www.kaggle.com/competitions/h-and-m-personalized-fashion-recommendations/data",
+                "archive_url": "https://www.kaggle.com/api/v1/competitions/data/download-all/h-and-m-personalized-fashion-recommendations",
+                "sha256": None,
+                "target_dir": "hm",
                 "description": "Dataset com produtos, clientes e transações da H&M",
                 "files": [
                     "articles.csv",
@@ -69,6 +72,9 @@ class DataCollector:
             "rent_runway": {
                 "name": "Rent the Runway Fit Data",
                 "url": "https://www.kaggle.com/datasets/rmisra/rent-the-runway",
+                "archive_url": "https://www.kaggle.com/api/v1/datasets/download/rmisra/rent-the-runway",
+                "sha256": None,
+                "target_dir": "rent_runway",
                 "description": "Dataset com avaliações de caimento de roupas femininas",
                 "files": [
                     "renttherunway_final_data.json"
@@ -84,6 +90,76 @@ class DataCollector:
         
         return datasets_info
     
+    def download_dataset(self, name: str, url: Optional[str] = None,
+                         sha256: Optional[str] = None, workers: int = 8,
+                         chunk_size: int = 8 * 1024 * 1024,
+                         auth: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """
+        Baixa e extrai em fluxo o arquivo completo de um dataset.
+        
+        Usa requisições HTTP Range em paralelo, retoma downloads interrompidos
+        e verifica checksums. Apenas os arquivos listados em "files" são
+        gravados (ex.: as imagens da H&M são ignoradas) e, sem SHA-256
+        configurado, apenas os bytes desses arquivos são baixados.
+        
+        Args:
+            name: Chave do dataset em download_datasets_info() ("hm_fashion", "rent_runway")
+            url: URL do arquivo ZIP (padrão: API do Kaggle)
+            sha256: SHA-256 esperado do arquivo (padrão: valor em download_datasets_info())
+            workers: Número de requisições simultâneas
+            chunk_size: Tamanho de cada requisição Range em bytes
+            auth: Credenciais (usuário, chave); padrão: credenciais do Kaggle
+            
+        Returns:
+            Dict com o resultado da aquisição
+        """
+        from .acquisition import ArchiveAcquirer, ParallelDownloader
+        
+        info = self.download_datasets_info()[name]
+        url = url or info['archive_url']
+        sha256 = sha256 or info.get('sha256')
+        if auth is None and url == info['archive_url']:
+            auth = self._kaggle_credentials()
+        
+        files = tuple(info.get('files', []))
+        
+        def include(member: str) -> bool:
+            return os.path.basename(member).startswith(files)
+        
+        downloader = ParallelDownloader(workers=workers, chunk_size=chunk_size, auth=auth)
+        target_dir = f"{self.data_dir}/{info['target_dir']}"
+        
+        logger.info(f"Baixando {info['name']} para {target_dir}...")
+        return ArchiveAcquirer(downloader).acquire(url, target_dir, sha256=sha256, include=include)
+    
+    def download_datasets(self, workers: int = 8) -> Dict[str, Dict[str, Any]]:
+        """
+        Baixa e extrai todos os datasets completos.
+        
+        Args:
+            workers: Número de requisições simultâneas por download
+            
+        Returns:
+            Dict com o resultado da aquisição de cada dataset
+        """
+        return {name: self.download_dataset(name, workers=workers)
+                for name in self.download_datasets_info()}
+    
+    def _kaggle_credentials(self) -> Optional[Tuple[str, str]]:
+        """Obtém as credenciais da API do Kaggle (variáveis de ambiente ou kaggle.json)."""
+        username, key = os.environ.get('KAGGLE_USERNAME'), os.environ.get('KAGGLE_KEY')
+        if username and key:
+            return username, key
+        
+        config_path = os.path.expanduser("~/.kaggle/kaggle.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            return config.get('username'), config.get('key')
+        
+        logger.warning("Credenciais do Kaggle não encontradas (KAGGLE_USERNAME/KAGGLE_KEY).")
+        return None
+    
     def create_sample_data(self) -> None:
         """
         Cria dados de exemplo para desenvolvimento e testes.
@@ -121,6 +197,20 @@ class DataCollector:
                           '474cc7c952fb2725c16b1e95d6ca2c727a0a3f4d8b5e3a3c8f2e7d1']
         })
         
+        # Sample H&M Transactions Data
+        transactions_sample = pd.DataFrame({
+            't_dat': ['2020-06-02', '2020-06-02', '2020-08-14', '2020-09-20',
+                      '2020-07-11', '2020-09-01', '2020-09-15', '2020-09-15',
+                      '2019-12-24', '2020-09-21'],
+            'customer_id': [customers_sample['customer_id'][i] for i in [0, 0, 0, 0, 1, 1, 1, 1, 3, 3]],
+            'article_id': ['108775015', '111565001', '108775044', '111565002',
+                           '111565001', '108775015', '111565002', '111565001',
+                           '108775044', '111565001'],
+            'price': [0.0508, 0.0169, 0.0508, 0.0169, 0.0169,
+                      0.0508, 0.0169, 0.0169, 0.0423, 0.0169],
+            'sales_channel_id': [2, 2, 1, 2, 2, 2, 1, 1, 2, 2]
+        })
+        
         # Sample Rent the Runway inspired data (adapted for men's clothing)
         fit_data_sample = pd.DataFrame({
             'user_id': [1, 2, 3, 4, 5],
@@ -138,6 +228,7 @@ class DataCollector:
         # Salvar dados de exemplo
         articles_sample.to_csv(f"{self.data_dir}/hm/articles_sample.csv", index=False)
         customers_sample.to_csv(f"{self.data_dir}/hm/customers_sample.csv", index=False)
+        transactions_sample.to_csv(f"{self.data_dir}/hm/transactions_sample.csv", index=False)
         fit_data_sample.to_csv(f"{self.data_dir}/rent_runway/fit_data_sample.csv", index=False)
         
         logger.info("Dados de exemplo criados com sucesso!")
@@ -187,7 +278,12 @@ class DataCollector:
            - Baixe o arquivo: renttherunway_final_data.json
            - Coloque o arquivo em: data/raw/rent_runway/
         
-        3. Instalação da API do Kaggle (opcional):
+        3. Download automático (requer credenciais do Kaggle):
+           - Defina KAGGLE_USERNAME e KAGGLE_KEY (ou ~/.kaggle/kaggle.json)
+           - Execute: python run.py download-data
+           - O download é paralelo, retomável e extraído direto em data/raw/
+        
+        4. Instalação da API do Kaggle (opcional):
            - pip install kaggle
            - Configure suas credenciais: https://www.kaggle.com/docs/api
            - Use os comandos abaixo para download automático:
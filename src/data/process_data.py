@@ -9,6 +9,8 @@ dos dados coletados para análise e modelagem.
 import pandas as pd
 import numpy as np
 import json
+import hashlib
+import os
 import re
 from typing import Dict, List, Optional, Tuple, Any
 import logging
@@ -18,6 +20,38 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Manifesto das saídas processadas (linhas, colunas e checksums)
+MANIFEST_FILENAME = "manifest.json"
+
+
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Calcula o SHA-256 de um arquivo lendo em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_raw_path(raw_data_dir: str, dataset: str, full_name: str, sample_name: str) -> str:
+    """
+    Retorna o caminho do arquivo bruto completo, ou do exemplo se não existir.
+    
+    Args:
+        raw_data_dir: Diretório com dados brutos
+        dataset: Subdiretório do dataset (ex.: "hm")
+        full_name: Nome do arquivo completo (ex.: "customers.csv")
+        sample_name: Nome do arquivo de exemplo (ex.: "customers_sample.csv")
+        
+    Returns:
+        Caminho do arquivo a ser usado
+    """
+    full_path = f"{raw_data_dir}/{dataset}/{full_name}"
+    if os.path.exists(full_path):
+        return full_path
+    return f"{raw_data_dir}/{dataset}/{sample_name}"
+
+
 class DataProcessor:
     """
     Classe responsável pelo processamento e limpeza dos dados.
@@ -35,7 +69,6 @@ class DataProcessor:
     
     def ensure_directories(self) -> None:
         """Garante que os diretórios necessários existam."""
-        import os
         os.makedirs(self.processed_dir, exist_ok=True)
     
     def clean_hm_articles(self, articles_df: pd.DataFrame) -> pd.DataFrame:
@@ -77,12 +110,15 @@ class DataProcessor:
         logger.info(f"Artigos H&M limpos: {len(df)} produtos masculinos")
         return df
     
-    def clean_hm_customers(self, customers_df: pd.DataFrame) -> pd.DataFrame:
+    def clean_hm_customers(self, customers_df: pd.DataFrame,
+                           impute_age: bool = True) -> pd.DataFrame:
         """
         Limpa e padroniza os dados de clientes da H&M.
         
         Args:
             customers_df: DataFrame com dados dos clientes
+            impute_age: Preencher idades ausentes com a mediana. No modo
+                particionado, a imputação é feita depois com a mediana global.
             
         Returns:
             DataFrame limpo e padronizado
@@ -94,8 +130,10 @@ class DataProcessor:
         # Tratar valores ausentes em idade
         if 'age' in df.columns:
             df['age'] = pd.to_numeric(df['age'], errors='coerce')
-            df['age'] = df['age'].fillna(df['age'].median())
+            df['age_imputed'] = df['age'].isna()
             df['age_group'] = df['age'].apply(self._categorize_age)
+            if impute_age:
+                df = self.impute_age(df, df['age'].median())
         
         # Padronizar status do clube
         if 'club_member_status' in df.columns:
@@ -111,6 +149,24 @@ class DataProcessor:
         logger.info(f"Clientes H&M limpos: {len(df)} registros")
         return df
     
+    def impute_age(self, customers_df: pd.DataFrame, age_median: float) -> pd.DataFrame:
+        """
+        Preenche idades ausentes e recalcula o grupo etário dessas linhas.
+        
+        Args:
+            customers_df: DataFrame de clientes com as colunas age e age_group
+            age_median: Mediana usada na imputação
+            
+        Returns:
+            DataFrame com as idades imputadas
+        """
+        df = customers_df
+        missing = df['age'].isna()
+        if missing.any():
+            df.loc[missing, 'age'] = age_median
+            df.loc[missing, 'age_group'] = df.loc[missing, 'age'].apply(self._categorize_age)
+        return df
+    
     def clean_fit_data(self, fit_df: pd.DataFrame) -> pd.DataFrame:
         """
         Limpa e padroniza os dados de caimento.
@@ -216,15 +272,78 @@ class DataProcessor:
         # Salvar em CSV
         csv_path = f"{self.processed_dir}/{filename}.csv"
         df.to_csv(csv_path, index=False)
+        saved_paths = [csv_path]
         
         # Salvar em Parquet (mais eficiente para datasets grandes)
         try:
             parquet_path = f"{self.processed_dir}/{filename}.parquet"
             df.to_parquet(parquet_path, index=False)
+            saved_paths.append(parquet_path)
             logger.info(f"Dados salvos: {csv_path} e {parquet_path}")
         except Exception as e:
             logger.warning(f"Erro ao salvar em Parquet: {e}")
             logger.info(f"Dados salvos apenas em CSV: {csv_path}")
+        
+        self.update_manifest(filename, df, saved_paths)
+    
+    def update_manifest(self, filename: str, df: pd.DataFrame, paths: List[str]) -> None:
+        """
+        Registra uma saída processada no manifesto (manifest.json).
+        
+        O manifesto guarda número de linhas, colunas e checksum de cada
+        arquivo, permitindo que etapas seguintes detectem mudanças.
+        
+        Args:
+            filename: Nome base do arquivo (sem extensão)
+            df: DataFrame salvo
+            paths: Caminhos dos arquivos gravados
+        """
+        manifest = self.load_manifest()
+        manifest[filename] = {
+            'rows': len(df),
+            'columns': list(map(str, df.columns)),
+            'files': {os.path.basename(path): _file_sha256(path) for path in paths},
+            'updated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        
+        with open(f"{self.processed_dir}/{MANIFEST_FILENAME}", 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    def load_manifest(self) -> Dict[str, Any]:
+        """
+        Carrega o manifesto das saídas processadas.
+        
+        Returns:
+            Dict com uma entrada por arquivo processado (vazio se não existir)
+        """
+        manifest_path = f"{self.processed_dir}/{MANIFEST_FILENAME}"
+        if not os.path.exists(manifest_path):
+            return {}
+        
+        with open(manifest_path) as f:
+            return json.load(f)
+    
+    def load_processed_data(self, filename: str) -> pd.DataFrame:
+        """
+        Carrega dados processados, preferindo Parquet (preserva os tipos).
+        
+        No CSV, apenas células vazias são lidas como ausentes, para que valores
+        como 'None' (preenchidos na limpeza) não voltem como NaN.
+        
+        Args:
+            filename: Nome base do arquivo (sem extensão)
+            
+        Returns:
+            DataFrame carregado
+        """
+        parquet_path = f"{self.processed_dir}/{filename}.parquet"
+        if os.path.exists(parquet_path):
+            try:
+                return pd.read_parquet(parquet_path)
+            except Exception as e:
+                logger.warning(f"Erro ao ler Parquet, usando CSV: {e}")
+        return pd.read_csv(f"{self.processed_dir}/{filename}.csv",
+                           keep_default_na=False, na_values=[''])
     
     def _categorize_product_type(self, product_type: str) -> str:
         """Categoriza tipos de produto."""
@@ -311,9 +430,9 @@ def process_all_data(raw_data_dir: str = "data/raw",
     processor = DataProcessor(processed_data_dir)
     
     try:
-        # Carregar dados brutos (usando dados de exemplo)
-        articles_df = pd.read_csv(f"{raw_data_dir}/hm/articles_sample.csv")
-        customers_df = pd.read_csv(f"{raw_data_dir}/hm/customers_sample.csv")
+        # Carregar dados brutos (completos quando disponíveis; caso contrário, exemplos)
+        articles_df = pd.read_csv(resolve_raw_path(raw_data_dir, 'hm', 'articles.csv', 'articles_sample.csv'))
+        customers_df = pd.read_csv(resolve_raw_path(raw_data_dir, 'hm', 'customers.csv', 'customers_sample.csv'))
         fit_df = pd.read_csv(f"{raw_data_dir}/rent_runway/fit_data_sample.csv")
         
         # Processar cada dataset
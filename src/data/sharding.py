@@ -0,0 +1,374 @@
+"""
+Consultor de Estilo Virtual - Sharded Processing Module
+======================================================
+
+Este módulo permite processar clientes e transações da H&M em N partições
+(shards) independentes, particionadas por hash de customer_id. Cada worker
+processa apenas o seu shard (limpeza de clientes e features de transações)
+e uma etapa de merge combina as saídas e as estatísticas globais (ex.: a
+mediana de idade usada na imputação), produzindo o mesmo resultado de uma
+execução em um único nó.
+
+Estrutura em disco (diretório compartilhado entre os workers):
+
+    data/shards/
+    ├── partition.json             # número de shards e estatísticas globais
+    └── shard-000/
+        ├── raw/hm/                # clientes e transações do shard
+        └── processed/             # saídas do worker (+ manifest.json)
+
+Uso:
+    python run.py shard-data --shards 4          # particionar
+    python run.py process-shard --shard 0        # um worker por shard
+    python run.py merge-shards                   # combinar resultados
+    python run.py process-sharded --shards 4 --verify  # tudo localmente
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from .process_data import DataProcessor, process_all_data, resolve_raw_path
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Descrição da partição (gravada pelo particionamento e lida pelos workers)
+PARTITION_FILENAME = "partition.json"
+
+# Coluna com a posição original de cada cliente, para restaurar a ordem no merge
+ROW_COLUMN = "_row"
+
+# Linhas lidas por vez ao particionar arquivos grandes
+DEFAULT_CHUNK_ROWS = 2_000_000
+
+# Saídas comparadas com a execução em um único nó
+VERIFIED_OUTPUTS = ['hm_customers_clean', 'hm_articles_clean', 'fit_data_clean', 'hm_daily_purchases']
+
+
+def shard_of(customer_ids: pd.Series, n_shards: int) -> np.ndarray:
+    """
+    Calcula o shard de cada customer_id.
+
+    Usa o hash estável do pandas, de modo que o mesmo cliente cai sempre no
+    mesmo shard, em qualquer processo ou máquina.
+
+    Args:
+        customer_ids: Série com os identificadores dos clientes
+        n_shards: Número de shards
+
+    Returns:
+        Array com o índice do shard de cada linha
+    """
+    hashes = pd.util.hash_pandas_object(customer_ids.astype(str), index=False).to_numpy()
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def shard_dir(shard_root: str, shard: int) -> str:
+    """Retorna o diretório de um shard."""
+    return f"{shard_root}/shard-{shard:03d}"
+
+
+def load_partition(shard_root: str = "data/shards") -> Dict:
+    """
+    Carrega a descrição da partição.
+
+    Args:
+        shard_root: Diretório compartilhado dos shards
+
+    Returns:
+        Dict com n_shards, as_of e contagens por shard
+    """
+    with open(f"{shard_root}/{PARTITION_FILENAME}") as f:
+        return json.load(f)
+
+
+def partition_data(n_shards: int, raw_data_dir: str = "data/raw",
+                   shard_root: str = "data/shards",
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict:
+    """
+    Particiona clientes e transações por hash de customer_id.
+
+    Os arquivos são lidos em blocos, de modo que o histórico completo não
+    precisa caber em memória. A data de referência das features (dia seguinte
+    à última transação) é calculada globalmente e gravada na partição.
+
+    Args:
+        n_shards: Número de shards
+        raw_data_dir: Diretório com dados brutos
+        shard_root: Diretório compartilhado dos shards
+        chunk_rows: Linhas lidas por bloco
+
+    Returns:
+        Dict com a descrição da partição
+    """
+    logger.info(f"Particionando dados em {n_shards} shards...")
+
+    if os.path.exists(shard_root):
+        shutil.rmtree(shard_root)
+    for shard in range(n_shards):
+        os.makedirs(f"{shard_dir(shard_root, shard)}/raw/hm", exist_ok=True)
+
+    customers_path = resolve_raw_path(raw_data_dir, 'hm', 'customers.csv', 'customers_sample.csv')
+    customer_rows = _partition_csv(customers_path, 'customers.csv', n_shards, shard_root,
+                                   chunk_rows, row_column=ROW_COLUMN)
+
+    # Transações são opcionais; a data máxima é global a todos os shards
+    transactions_path = resolve_raw_path(raw_data_dir, 'hm', 'transactions_train.csv',
+                                         'transactions_sample.csv')
+    transaction_rows, as_of = [0] * n_shards, None
+    if os.path.exists(transactions_path):
+        max_dates = []
+        transaction_rows = _partition_csv(transactions_path, 'transactions.csv', n_shards,
+                                          shard_root, chunk_rows, max_dates=max_dates)
+        if max_dates:
+            as_of = (pd.Timestamp(max(max_dates)) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+    partition = {
+        'n_shards': n_shards,
+        'raw_data_dir': raw_data_dir,
+        'as_of': as_of,
+        'customer_rows': customer_rows,
+        'transaction_rows': transaction_rows,
+        'created_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(f"{shard_root}/{PARTITION_FILENAME}", 'w') as f:
+        json.dump(partition, f, indent=2)
+
+    logger.info(f"Partição criada: {sum(customer_rows)} clientes, "
+                f"{sum(transaction_rows)} transações em {n_shards} shards")
+    return partition
+
+
+def _partition_csv(path: str, output_name: str, n_shards: int, shard_root: str,
+                   chunk_rows: int, row_column: Optional[str] = None,
+                   max_dates: Optional[List[str]] = None) -> List[int]:
+    """Distribui as linhas de um CSV entre os shards, bloco a bloco."""
+    rows = [0] * n_shards
+    offset = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype={'customer_id': str}):
+        if row_column is not None:
+            chunk.insert(0, row_column, np.arange(offset, offset + len(chunk)))
+        if max_dates is not None and len(chunk):
+            max_dates.append(str(chunk['t_dat'].max()))
+        offset += len(chunk)
+
+        for shard, part in chunk.groupby(shard_of(chunk['customer_id'], n_shards), sort=False):
+            output_path = f"{shard_dir(shard_root, shard)}/raw/hm/{output_name}"
+            part.to_csv(output_path, mode='a', header=rows[shard] == 0, index=False)
+            rows[shard] += len(part)
+
+    # Shards sem linhas recebem apenas o cabeçalho
+    header = pd.read_csv(path, nrows=0)
+    if row_column is not None:
+        header.insert(0, row_column, [])
+    for shard in range(n_shards):
+        if rows[shard] == 0:
+            header.to_csv(f"{shard_dir(shard_root, shard)}/raw/hm/{output_name}", index=False)
+
+    return rows
+
+
+def process_shard(shard: int, shard_root: str = "data/shards") -> None:
+    """
+    Processa um shard: limpeza de clientes e features de transações.
+
+    A imputação de idade é adiada para o merge (que conhece a mediana
+    global); o worker grava a contagem de idades do shard para isso.
+
+    Args:
+        shard: Índice do shard
+        shard_root: Diretório compartilhado dos shards
+    """
+    from features.transaction_features import (TransactionFeatureBuilder,
+                                               load_article_categories, load_transactions)
+
+    partition = load_partition(shard_root)
+    base_dir = shard_dir(shard_root, shard)
+    processor = DataProcessor(f"{base_dir}/processed")
+    logger.info(f"Processando shard {shard + 1}/{partition['n_shards']}...")
+
+    customers_df = pd.read_csv(f"{base_dir}/raw/hm/customers.csv")
+
+    # Estatística parcial: contagem de idades antes da remoção de duplicatas
+    ages = pd.to_numeric(customers_df['age'], errors='coerce')
+    age_counts = ages.value_counts().rename_axis('age').reset_index(name='count')
+    processor.save_processed_data(age_counts, "age_counts")
+
+    customers_clean = processor.clean_hm_customers(customers_df, impute_age=False)
+
+    transactions_path = f"{base_dir}/raw/hm/transactions.csv"
+    if partition['as_of'] is not None:
+        raw_data_dir = partition['raw_data_dir']
+        transactions_df = load_transactions(transactions_path)
+        article_categories = load_article_categories(
+            resolve_raw_path(raw_data_dir, 'hm', 'articles.csv', 'articles_sample.csv'), processor)
+
+        builder = TransactionFeatureBuilder()
+        features_df = builder.build_features(transactions_df, article_categories,
+                                             as_of=pd.Timestamp(partition['as_of']))
+        customers_clean = builder.add_features_to_customers(customers_clean, features_df)
+        processor.save_processed_data(builder.daily_purchase_counts(transactions_df),
+                                      "hm_daily_purchases")
+
+    processor.save_processed_data(customers_clean, "hm_customers_clean")
+    logger.info(f"Shard {shard} processado: {len(customers_clean)} clientes")
+
+
+def merge_shards(shard_root: str = "data/shards",
+                 processed_data_dir: str = "data/processed") -> pd.DataFrame:
+    """
+    Combina as saídas dos shards no diretório processado.
+
+    Calcula a mediana global de idade a partir das contagens dos shards,
+    imputa as idades ausentes, restaura a ordem original dos clientes e
+    processa artigos, dados de caimento e o dataset híbrido, gerando as
+    mesmas saídas de process_all_data + build-features.
+
+    Args:
+        shard_root: Diretório compartilhado dos shards
+        processed_data_dir: Diretório para dados processados
+
+    Returns:
+        DataFrame de clientes combinado
+    """
+    partition = load_partition(shard_root)
+    n_shards = partition['n_shards']
+    logger.info(f"Combinando {n_shards} shards...")
+
+    shard_processors = [DataProcessor(f"{shard_dir(shard_root, shard)}/processed")
+                        for shard in range(n_shards)]
+    missing = [shard for shard, shard_processor in enumerate(shard_processors)
+               if 'hm_customers_clean' not in shard_processor.load_manifest()]
+    if missing:
+        raise FileNotFoundError(f"Shards não processados: {missing}")
+
+    processor = DataProcessor(processed_data_dir)
+
+    # Mediana global a partir das contagens de idade de todos os shards
+    age_counts = pd.concat([p.load_processed_data("age_counts") for p in shard_processors])
+    age_median = median_from_counts(age_counts.groupby('age')['count'].sum())
+
+    customers_df = pd.concat([p.load_processed_data("hm_customers_clean") for p in shard_processors],
+                             ignore_index=True)
+    customers_df = customers_df.sort_values(ROW_COLUMN, kind='stable').drop(columns=ROW_COLUMN)
+    customers_df = customers_df.reset_index(drop=True)
+    if 'age' in customers_df.columns:
+        customers_df = processor.impute_age(customers_df, age_median)
+
+    # Artigos e dados de caimento são pequenos e processados uma única vez
+    raw_data_dir = partition['raw_data_dir']
+    articles_df = pd.read_csv(resolve_raw_path(raw_data_dir, 'hm', 'articles.csv', 'articles_sample.csv'))
+    fit_df = pd.read_csv(f"{raw_data_dir}/rent_runway/fit_data_sample.csv")
+    articles_clean = processor.clean_hm_articles(articles_df)
+    fit_clean = processor.clean_fit_data(fit_df)
+    hybrid_df = processor.create_hybrid_dataset(articles_clean, customers_df, fit_clean)
+
+    processor.save_processed_data(articles_clean, "hm_articles_clean")
+    processor.save_processed_data(customers_df, "hm_customers_clean")
+    processor.save_processed_data(fit_clean, "fit_data_clean")
+    processor.save_processed_data(hybrid_df, "hybrid_dataset")
+
+    # Compras diárias: soma das contagens de cada shard
+    daily = [p.load_processed_data("hm_daily_purchases") for p in shard_processors
+             if 'hm_daily_purchases' in p.load_manifest()]
+    if daily:
+        daily_df = pd.concat(daily).groupby('t_dat', sort=True)['purchases'].sum().reset_index()
+        processor.save_processed_data(daily_df, "hm_daily_purchases")
+
+    logger.info(f"Shards combinados: {len(customers_df)} clientes (mediana de idade global: {age_median})")
+    return customers_df
+
+
+def median_from_counts(counts: pd.Series) -> float:
+    """
+    Calcula a mediana exata a partir de contagens por valor.
+
+    Args:
+        counts: Série indexada pelo valor com o número de ocorrências
+
+    Returns:
+        Mediana (NaN se não houver valores)
+    """
+    counts = counts[counts > 0].sort_index()
+    total = int(counts.sum())
+    if total == 0:
+        return float('nan')
+
+    cumulative = counts.cumsum().to_numpy()
+    values = counts.index.to_numpy(dtype=float)
+    lower = values[np.searchsorted(cumulative, (total + 1) // 2)]
+    upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+
+def run_sharded_locally(n_shards: int, raw_data_dir: str = "data/raw",
+                        shard_root: str = "data/shards",
+                        processed_data_dir: str = "data/processed") -> pd.DataFrame:
+    """
+    Executa o modo particionado localmente com N processos worker.
+
+    Args:
+        n_shards: Número de shards (e de processos)
+        raw_data_dir: Diretório com dados brutos
+        shard_root: Diretório compartilhado dos shards
+        processed_data_dir: Diretório para dados processados
+
+    Returns:
+        DataFrame de clientes combinado
+    """
+    partition_data(n_shards, raw_data_dir, shard_root)
+
+    with ProcessPoolExecutor(max_workers=n_shards) as pool:
+        futures = [pool.submit(process_shard, shard, shard_root) for shard in range(n_shards)]
+        for future in futures:
+            future.result()
+
+    return merge_shards(shard_root, processed_data_dir)
+
+
+def verify_against_single_node(raw_data_dir: str = "data/raw",
+                               processed_data_dir: str = "data/processed") -> Dict[str, bool]:
+    """
+    Compara as saídas combinadas com uma execução em um único nó.
+
+    O dataset híbrido não é comparado, pois usa amostragem aleatória.
+
+    Args:
+        raw_data_dir: Diretório com dados brutos
+        processed_data_dir: Diretório com as saídas combinadas dos shards
+
+    Returns:
+        Dict com o nome de cada saída e se ela é idêntica à do único nó
+    """
+    from features.transaction_features import build_transaction_features
+
+    sharded = DataProcessor(processed_data_dir)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as single_dir:
+        process_all_data(raw_data_dir, single_dir)
+        build_transaction_features(raw_data_dir, single_dir)
+        single = DataProcessor(single_dir)
+
+        for name in VERIFIED_OUTPUTS:
+            if name not in single.load_manifest():
+                continue
+            try:
+                pd.testing.assert_frame_equal(sharded.load_processed_data(name),
+                                              single.load_processed_data(name))
+                results[name] = True
+            except (AssertionError, FileNotFoundError) as e:
+                logger.warning(f"Saída diferente da execução em um único nó: {name}: {e}")
+                results[name] = False
+
+    return results
@@ -0,0 +1,13 @@
+"""
+Consultor de Estilo Virtual - __init__.py
+=========================================
+
+Módulo de engenharia de features.
+"""
+
+from .transaction_features import (TransactionFeatureBuilder, build_transaction_features,
+                                   load_article_categories, load_transactions,
+                                   benchmark_transaction_features)
+
+__all__ = ['TransactionFeatureBuilder', 'build_transaction_features',
+           'load_article_categories', 'load_transactions', 'benchmark_transaction_features']
@@ -0,0 +1,540 @@
+"""
+Consultor de Estilo Virtual - Transaction Features Module
+========================================================
+
+Este módulo calcula features comportamentais dos clientes a partir do
+histórico de transações da H&M: métricas RFM (recência, frequência e
+valor monetário), contagens de compras em janelas de 7/30/90 dias e a
+participação de cada categoria de produto nas compras.
+
+As transações são ordenadas uma única vez por (cliente, data) e todas as
+métricas são obtidas com operações por segmento do NumPy sobre os arrays
+ordenados, sem groupby-apply. Isso permite processar o histórico completo
+(~31M transações) em uma única máquina.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Janelas (em dias) para contagem de compras recentes
+DEFAULT_WINDOWS = (7, 30, 90)
+
+# Categorias geradas por DataProcessor._categorize_product_type
+PRODUCT_CATEGORIES = ['Tops', 'Bottoms', 'Outerwear', 'Footwear', 'Accessories', 'Other']
+
+# Tamanho do histórico completo da H&M (transactions_train.csv)
+HM_FULL_TRANSACTIONS = 31_788_324
+HM_FULL_CUSTOMERS = 1_362_281
+HM_FULL_ARTICLES = 105_542
+
+# Orçamento de tempo (segundos) da etapa build-features sobre o histórico
+# completo em uma única máquina: leitura das transações (cópia colunar em
+# cache), cálculo das features, junção com os clientes e gravação das saídas.
+# A conversão inicial do CSV para o cache (uma vez por download) não entra.
+FULL_HISTORY_TIME_BUDGET = 60.0
+
+# Cópia colunar das transações, reaproveitada enquanto o CSV não mudar. O
+# customer_id é gravado como código inteiro e os ids em um arquivo à parte: o
+# dicionário de ~1.4M ids excede o limite de dicionário do Parquet e seria
+# lido de volta como strings densas.
+TRANSACTIONS_CACHE_FILENAME = "transactions.parquet"
+TRANSACTIONS_CACHE_CUSTOMERS_FILENAME = "transactions_customers.parquet"
+TRANSACTIONS_CACHE_INFO_FILENAME = "transactions.json"
+
+
+class TransactionFeatureBuilder:
+    """
+    Classe responsável pelo cálculo das features de transações por cliente.
+    """
+
+    def __init__(self, windows: Sequence[int] = DEFAULT_WINDOWS,
+                 categories: Sequence[str] = PRODUCT_CATEGORIES):
+        """
+        Inicializa o construtor de features.
+
+        Args:
+            windows: Tamanhos das janelas (em dias) para contagem de compras
+            categories: Categorias de produto usadas no cálculo das participações
+        """
+        self.windows = tuple(sorted(windows))
+        self.categories = list(categories)
+
+    def build_features(self, transactions_df: pd.DataFrame,
+                       article_categories: pd.Series,
+                       as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Calcula as features de transações para cada cliente.
+
+        Args:
+            transactions_df: DataFrame com colunas customer_id, t_dat, article_id e price
+            article_categories: Série indexada por article_id com a categoria do produto
+            as_of: Data de referência; por padrão, o dia seguinte à última transação
+
+        Returns:
+            DataFrame com uma linha por cliente e as features calculadas
+        """
+        logger.info(f"Calculando features de {len(transactions_df)} transações...")
+
+        # Códigos inteiros por cliente (0..C-1); categorias já vêm codificadas
+        customer_ids = transactions_df['customer_id']
+        if isinstance(customer_ids.dtype, pd.CategoricalDtype):
+            customer_ids = customer_ids.cat.remove_unused_categories()
+            codes = customer_ids.cat.codes.to_numpy()
+            uniques = customer_ids.cat.categories
+        else:
+            codes, uniques = pd.factorize(customer_ids, sort=False)
+
+        days = self._to_days(transactions_df['t_dat'])
+        prices = transactions_df['price'].to_numpy(dtype=np.float64)
+        category_codes = self._map_categories(transactions_df['article_id'], article_categories)
+
+        # Transações sem customer_id (código -1) não pertencem a nenhum cliente
+        mask = codes >= 0
+        if as_of is None:
+            as_of_day = int(days.max()) + 1 if len(days) else 0
+        else:
+            as_of_day = int(self._to_days(pd.Series([as_of]))[0])
+
+            # Considerar apenas transações anteriores à data de referência
+            mask &= days < as_of_day
+
+        if not mask.all():
+            codes, days = codes[mask], days[mask]
+            prices, category_codes = prices[mask], category_codes[mask]
+
+        features = self.compute_segment_features(codes, days, prices,
+                                                 category_codes, as_of_day)
+        features.insert(0, 'customer_id', np.asarray(uniques)[features.pop('customer_code')])
+
+        logger.info(f"Features de transações calculadas: {len(features)} clientes")
+        return features
+
+    def compute_segment_features(self, codes: np.ndarray, days: np.ndarray,
+                                 prices: np.ndarray, category_codes: np.ndarray,
+                                 as_of_day: int) -> pd.DataFrame:
+        """
+        Calcula as features a partir de arrays já codificados.
+
+        Args:
+            codes: Código inteiro do cliente por transação
+            days: Data da transação em dias desde a época
+            prices: Preço pago por transação
+            category_codes: Índice da categoria do produto por transação
+            as_of_day: Data de referência em dias desde a época
+
+        Returns:
+            DataFrame com a coluna customer_code e as features por cliente
+        """
+        n = len(codes)
+        if n == 0:
+            empty = {'customer_code': np.empty(0, dtype=np.int64)}
+            empty.update({col: np.empty(0) for col in self.feature_columns()})
+            return pd.DataFrame(empty)
+
+        # Ordenação única por (cliente, data) através de uma chave combinada
+        key = (codes.astype(np.int64) << 32) | days.astype(np.int64)
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        sorted_codes = codes[order]
+
+        # Início de cada segmento (cliente) nos arrays ordenados
+        boundary = np.empty(n, dtype=bool)
+        boundary[0] = True
+        np.not_equal(sorted_codes[1:], sorted_codes[:-1], out=boundary[1:])
+        starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], n)
+        customer_codes = sorted_codes[starts]
+        n_items = ends - starts
+
+        # Recência: dias desde a última compra (último elemento do segmento)
+        sorted_days = (key & 0xFFFFFFFF).astype(np.int32)
+        last_day = sorted_days[ends - 1]
+        first_day = sorted_days[starts]
+
+        # Frequência: dias distintos de compra (mudanças na chave ordenada)
+        new_visit = np.empty(n, dtype=np.int32)
+        new_visit[0] = 1
+        np.not_equal(key[1:], key[:-1], out=new_visit[1:])
+        frequency = np.add.reduceat(new_visit, starts)
+
+        # Valor monetário: soma dos preços por segmento
+        monetary = np.add.reduceat(prices[order], starts)
+
+        features = {
+            'customer_code': customer_codes,
+            'recency_days': as_of_day - last_day,
+            'tenure_days': as_of_day - first_day,
+            'frequency': frequency,
+            'monetary': monetary,
+            'n_items': n_items,
+        }
+
+        # Compras nas janelas: busca binária da data de corte na chave ordenada
+        segment_prefix = customer_codes.astype(np.int64) << 32
+        for window in self.windows:
+            cutoff = segment_prefix | max(as_of_day - window, 0)
+            first_in_window = np.searchsorted(key, cutoff, side='left')
+            features[f'purchases_{window}d'] = ends - first_in_window
+
+        # Participação de cada categoria nas compras do cliente
+        sorted_categories = category_codes[order]
+        for index, category in enumerate(self.categories):
+            counts = np.add.reduceat((sorted_categories == index).astype(np.int32), starts)
+            features[f'share_{category.lower()}'] = counts / n_items
+
+        return pd.DataFrame(features)
+
+    def daily_purchase_counts(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Conta as compras por dia do histórico de transações.
+
+        Args:
+            transactions_df: DataFrame com a coluna t_dat
+
+        Returns:
+            DataFrame com colunas t_dat e purchases (apenas dias com compras)
+        """
+        days = self._to_days(transactions_df['t_dat'])
+        if len(days) == 0:
+            return pd.DataFrame({'t_dat': pd.to_datetime([]),
+                                 'purchases': np.empty(0, dtype=np.int64)})
+
+        first_day = int(days.min())
+        counts = np.bincount(days - first_day)
+        active = np.flatnonzero(counts)
+
+        return pd.DataFrame({
+            't_dat': pd.to_datetime((active + first_day).astype('datetime64[D]')),
+            'purchases': counts[active],
+        })
+
+    def feature_columns(self) -> List[str]:
+        """Retorna os nomes das colunas de features geradas."""
+        columns = ['recency_days', 'tenure_days', 'frequency', 'monetary', 'n_items']
+        columns += [f'purchases_{window}d' for window in self.windows]
+        columns += [f'share_{category.lower()}' for category in self.categories]
+        return columns
+
+    def add_features_to_customers(self, customers_df: pd.DataFrame,
+                                  features_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adiciona as features de transações à tabela de clientes.
+
+        Args:
+            customers_df: Dados de clientes H&M limpos
+            features_df: Features calculadas por build_features
+
+        Returns:
+            DataFrame de clientes com as features de transações
+        """
+        df = customers_df.drop(columns=self.feature_columns(), errors='ignore')
+        df = df.merge(features_df, on='customer_id', how='left')
+
+        # Clientes sem transações: contagens zeradas, recência desconhecida
+        filled_columns = [col for col in self.feature_columns()
+                          if col not in ('recency_days', 'tenure_days')]
+        df[filled_columns] = df[filled_columns].fillna(0)
+
+        count_columns = ['frequency', 'n_items'] + [f'purchases_{window}d' for window in self.windows]
+        df[count_columns] = df[count_columns].astype(np.int64)
+
+        return df
+
+    def _to_days(self, dates: pd.Series) -> np.ndarray:
+        """Converte datas para dias desde a época (int32)."""
+        dates = pd.to_datetime(dates)
+        return dates.to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+    def _map_categories(self, article_ids: pd.Series,
+                        article_categories: pd.Series) -> np.ndarray:
+        """Mapeia cada transação para o índice da categoria do produto."""
+        category_index = pd.Index(self.categories)
+        other = category_index.get_loc('Other') if 'Other' in category_index else -1
+
+        # Índice de categoria por artigo, resolvido uma vez por artigo
+        article_index = pd.Index(pd.to_numeric(article_categories.index, errors='coerce'))
+        article_category_codes = category_index.get_indexer(article_categories.to_numpy())
+        article_category_codes[article_category_codes < 0] = other
+
+        positions = article_index.get_indexer(pd.to_numeric(article_ids, errors='coerce'))
+        category_codes = np.where(positions >= 0,
+                                  article_category_codes[positions], other)
+        return category_codes.astype(np.int8)
+
+
+def build_transaction_features(raw_data_dir: str = "data/raw",
+                               processed_data_dir: str = "data/processed",
+                               timings: Optional[Dict[str, float]] = None) -> Optional[pd.DataFrame]:
+    """
+    Calcula as features de transações e grava na tabela de clientes processada.
+
+    Também grava a contagem diária de compras (hm_daily_purchases), usada
+    pelas tabelas agregadas da análise exploratória.
+
+    Usa transactions_train.csv e articles.csv quando o histórico completo
+    está disponível e, caso contrário, os dados de exemplo. As transações são
+    lidas da cópia colunar em processed_data_dir/cache (ver load_transactions).
+
+    Args:
+        raw_data_dir: Diretório com dados brutos
+        processed_data_dir: Diretório com dados processados
+        timings: Dict opcional preenchido com o tempo (segundos) de cada etapa
+
+    Returns:
+        DataFrame de clientes com as features, ou None se faltarem dados
+    """
+    from data.process_data import DataProcessor, resolve_raw_path
+
+    processor = DataProcessor(processed_data_dir)
+    timings = {} if timings is None else timings
+
+    try:
+        start = time.perf_counter()
+        transactions_df = load_transactions(
+            resolve_raw_path(raw_data_dir, 'hm', 'transactions_train.csv', 'transactions_sample.csv'),
+            cache_dir=f"{processed_data_dir}/cache")
+        article_categories = load_article_categories(
+            resolve_raw_path(raw_data_dir, 'hm', 'articles.csv', 'articles_sample.csv'), processor)
+        customers_df = processor.load_processed_data("hm_customers_clean")
+        timings['load_seconds'] = time.perf_counter() - start
+        logger.info(f"Transações carregadas em {timings['load_seconds']:.2f}s")
+
+    except FileNotFoundError as e:
+        logger.error(f"Arquivo não encontrado: {e}")
+        logger.info("Execute collect-data e process-data antes de calcular as features.")
+        return None
+
+    builder = TransactionFeatureBuilder()
+    start = time.perf_counter()
+    features_df = builder.build_features(transactions_df, article_categories)
+    customers_df = builder.add_features_to_customers(customers_df, features_df)
+    timings['features_seconds'] = time.perf_counter() - start
+    logger.info(f"Features de transações calculadas em {timings['features_seconds']:.2f}s")
+
+    start = time.perf_counter()
+    processor.save_processed_data(customers_df, "hm_customers_clean")
+    processor.save_processed_data(builder.daily_purchase_counts(transactions_df),
+                                  "hm_daily_purchases")
+    timings['save_seconds'] = time.perf_counter() - start
+    return customers_df
+
+
+def load_article_categories(path: str, processor) -> pd.Series:
+    """
+    Carrega a categoria de produto de cada artigo (todos os departamentos).
+
+    Args:
+        path: Caminho para o CSV de artigos
+        processor: DataProcessor usado para categorizar os tipos de produto
+
+    Returns:
+        Série indexada por article_id com a categoria do produto
+    """
+    articles_df = pd.read_csv(path, usecols=['article_id', 'product_type_name'])
+
+    # Categoria calculada uma vez por tipo de produto
+    product_types = articles_df['product_type_name']
+    type_categories = {t: processor._categorize_product_type(t) for t in product_types.dropna().unique()}
+    return pd.Series(product_types.map(type_categories).fillna('Other').to_numpy(),
+                     index=articles_df['article_id'])
+
+
+def load_transactions(path: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Carrega as transações da H&M com tipos compactos.
+
+    Com cache_dir, a primeira leitura interpreta o CSV e grava uma cópia
+    colunar (Parquet); as seguintes leem essa cópia enquanto o CSV de origem
+    não mudar (tamanho e data de modificação). Sem um engine de Parquet
+    disponível, o CSV é lido a cada chamada.
+
+    Args:
+        path: Caminho para o CSV de transações
+        cache_dir: Diretório da cópia colunar (opcional)
+
+    Returns:
+        DataFrame com customer_id categórico e t_dat como data
+    """
+    if cache_dir is None:
+        return _read_transactions_csv(path)
+
+    info_path = f"{cache_dir}/{TRANSACTIONS_CACHE_INFO_FILENAME}"
+    source = _source_signature(path)
+
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            cached_source = json.load(f)
+        if cached_source == source:
+            try:
+                transactions_df = pd.read_parquet(f"{cache_dir}/{TRANSACTIONS_CACHE_FILENAME}")
+                customer_ids = pd.read_parquet(f"{cache_dir}/{TRANSACTIONS_CACHE_CUSTOMERS_FILENAME}")
+                transactions_df['customer_id'] = pd.Categorical.from_codes(
+                    transactions_df['customer_id'].to_numpy(), categories=customer_ids['customer_id'].to_numpy())
+                return transactions_df
+            except Exception as e:
+                logger.warning(f"Erro ao ler o cache de transações, usando CSV: {e}")
+
+    transactions_df = _read_transactions_csv(path)
+    write_transactions_cache(transactions_df, path, cache_dir)
+    return transactions_df
+
+
+def write_transactions_cache(transactions_df: pd.DataFrame, path: str, cache_dir: str) -> bool:
+    """
+    Grava a cópia colunar das transações lidas de path.
+
+    Args:
+        transactions_df: Transações no formato de load_transactions
+        path: Caminho do CSV de origem
+        cache_dir: Diretório da cópia colunar
+
+    Returns:
+        True se a cópia foi gravada
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    info_path = f"{cache_dir}/{TRANSACTIONS_CACHE_INFO_FILENAME}"
+    if os.path.exists(info_path):
+        os.remove(info_path)
+
+    customer_ids = transactions_df['customer_id'].astype('category').cat
+    try:
+        transactions_df.assign(customer_id=customer_ids.codes).to_parquet(
+            f"{cache_dir}/{TRANSACTIONS_CACHE_FILENAME}", index=False)
+        pd.DataFrame({'customer_id': customer_ids.categories}).to_parquet(
+            f"{cache_dir}/{TRANSACTIONS_CACHE_CUSTOMERS_FILENAME}", index=False)
+    except Exception as e:
+        logger.warning(f"Cache de transações não gravado: {e}")
+        return False
+
+    # A assinatura da origem é gravada por último: só valida um cache completo
+    with open(info_path, 'w') as f:
+        json.dump(_source_signature(path), f, indent=2)
+    return True
+
+
+def _read_transactions_csv(path: str) -> pd.DataFrame:
+    """Lê o CSV de transações com tipos compactos."""
+    return pd.read_csv(
+        path,
+        usecols=['t_dat', 'customer_id', 'article_id', 'price'],
+        dtype={'customer_id': 'category', 'article_id': 'int64', 'price': 'float64'},
+        parse_dates=['t_dat'],
+    )
+
+
+def _source_signature(path: str) -> Dict[str, object]:
+    """Identifica uma versão do arquivo de origem (caminho, tamanho e data)."""
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def benchmark_transaction_features(n_transactions: int = HM_FULL_TRANSACTIONS,
+                                   n_customers: Optional[int] = None,
+                                   n_articles: int = HM_FULL_ARTICLES,
+                                   time_budget: Optional[float] = FULL_HISTORY_TIME_BUDGET,
+                                   seed: int = 42) -> Dict[str, float]:
+    """
+    Mede o tempo da etapa build-features sobre dados sintéticos.
+
+    Gera, em um diretório temporário, transações com os tipos de
+    load_transactions (customer_id categórico com ids hexadecimais de 64
+    caracteres, t_dat como data) já na cópia colunar em cache, um CSV de
+    artigos e a tabela de clientes processada. O tempo medido é o de
+    build_transaction_features: leitura do cache, cálculo das features,
+    junção com os clientes e gravação das saídas. Por padrão, o histórico tem
+    o tamanho do dataset completo da H&M e o tempo é comparado com o
+    orçamento definido.
+
+    Args:
+        n_transactions: Número de transações geradas
+        n_customers: Número de clientes (padrão: proporcional ao dataset completo)
+        n_articles: Número de artigos distintos
+        time_budget: Orçamento de tempo em segundos (None para ignorar)
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Dict com tempos (segundos) por etapa e throughput
+    """
+    from data.process_data import DataProcessor
+
+    if n_customers is None:
+        n_customers = max(1, HM_FULL_CUSTOMERS * n_transactions // HM_FULL_TRANSACTIONS)
+
+    logger.info(f"Gerando {n_transactions} transações sintéticas...")
+    rng = np.random.default_rng(seed)
+
+    # Ids de clientes no formato da H&M (64 caracteres hexadecimais)
+    customer_ids = np.frombuffer(rng.bytes(32 * n_customers).hex().encode('ascii'),
+                                 dtype='S64').astype(str)
+    article_ids = 108_775_015 + np.sort(rng.choice(n_articles * 90, n_articles, replace=False))
+    product_types = np.array(['T-shirt', 'Trousers', 'Jacket', 'Sneakers', 'Bag', 'Underwear'])
+
+    # Período do dataset H&M: 2018-09-20 a 2020-09-22
+    start_day = np.datetime64('2018-09-20', 'D')
+    transactions_df = pd.DataFrame({
+        't_dat': (start_day + rng.integers(0, 734, n_transactions)).astype('datetime64[s]'),
+        'customer_id': pd.Categorical.from_codes(
+            rng.integers(0, n_customers, n_transactions, dtype=np.int32), categories=customer_ids),
+        'article_id': article_ids[rng.integers(0, n_articles, n_transactions)],
+        'price': rng.random(n_transactions) * 0.1,
+    })
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        raw_dir, processed_dir = f"{temp_dir}/raw", f"{temp_dir}/processed"
+        os.makedirs(f"{raw_dir}/hm")
+
+        # CSV de transações apenas com o cabeçalho: a etapa lê a cópia colunar
+        transactions_path = f"{raw_dir}/hm/transactions_train.csv"
+        transactions_df.head(0).to_csv(transactions_path, index=False)
+        if not write_transactions_cache(transactions_df, transactions_path, f"{processed_dir}/cache"):
+            raise RuntimeError("Cache colunar indisponível: instale um engine de Parquet (pyarrow).")
+        del transactions_df
+
+        pd.DataFrame({'article_id': article_ids,
+                      'product_type_name': product_types[rng.integers(0, len(product_types), n_articles)]}
+                     ).to_csv(f"{raw_dir}/hm/articles.csv", index=False)
+        DataProcessor(processed_dir).save_processed_data(
+            pd.DataFrame({'customer_id': customer_ids,
+                          'age': rng.integers(16, 90, n_customers).astype(np.float64)}),
+            "hm_customers_clean")
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        customers_df = build_transaction_features(raw_dir, processed_dir, timings=timings)
+        elapsed = time.perf_counter() - start
+
+    results = {
+        'transactions': float(n_transactions),
+        'customers': float(len(customers_df)),
+        **timings,
+        'seconds': elapsed,
+        'transactions_per_second': n_transactions / elapsed if elapsed > 0 else float('inf'),
+    }
+
+    logger.info(f"Etapa build-features em {elapsed:.2f}s (leitura {timings['load_seconds']:.2f}s, "
+                f"features {timings['features_seconds']:.2f}s, gravação {timings['save_seconds']:.2f}s)")
+
+    if time_budget is not None:
+        # Escalar o orçamento proporcionalmente quando o benchmark é menor
+        scaled_budget = time_budget * n_transactions / HM_FULL_TRANSACTIONS
+        results['time_budget'] = scaled_budget
+        if elapsed > scaled_budget:
+            logger.warning(f"Orçamento de tempo excedido: {elapsed:.2f}s > {scaled_budget:.2f}s")
+        else:
+            logger.info(f"Dentro do orçamento de tempo: {elapsed:.2f}s <= {scaled_budget:.2f}s")
+
+    return results
+
+if __name__ == "__main__":
+    # Benchmark sobre o tamanho do histórico completo da H&M
+    benchmark_transaction_features()
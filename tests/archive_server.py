@@ -0,0 +1,195 @@
+"""
+Servidor HTTP local e arquivos ZIP gerados para os testes de aquisição.
+
+O servidor atende HEAD e GET com Range (bytes=a-b), ETag e Accept-Ranges,
+pode desativar o suporte a Range, simular uma interrupção após um número
+de requisições GET ou redirecionar tudo para outro servidor (como a API do
+Kaggle, que redireciona para uma URL assinada do storage). O cabeçalho
+Authorization de cada requisição recebida é registrado.
+"""
+
+import hashlib
+import io
+import random
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+class _UnseekableWriter(io.RawIOBase):
+    """Destino sem seek: o zipfile grava data descriptors após cada membro."""
+
+    def __init__(self, buffer: io.BytesIO):
+        self.buffer = buffer
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self.buffer.write(data)
+
+
+def make_members(seed: int = 0) -> Dict[str, bytes]:
+    """Gera membros no formato do arquivo da H&M (CSVs e imagens)."""
+    rng = random.Random(seed)
+    return {
+        'articles.csv': b'article_id,product_type_name\n' + b''.join(
+            b'%d,T-shirt\n' % (108775015 + i) for i in range(5000)),
+        'customers.csv': b'customer_id,age\n' + b''.join(
+            b'%032x,%d\n' % (rng.getrandbits(128), rng.randint(16, 90)) for _ in range(3000)),
+        'images/010/0108775015.jpg': rng.randbytes(200_000),
+        'transactions_train.csv': b't_dat,customer_id,article_id,price\n' + b''.join(
+            b'2020-09-%02d,%032x,%d,0.05\n' % (rng.randint(1, 22), rng.getrandbits(128),
+                                             rng.randint(0, 5000)) for _ in range(8000)),
+        'images/010/0108775016.jpg': rng.randbytes(100_000),
+    }
+
+
+def make_zip(members: Dict[str, bytes], descriptors: bool = False,
+             zip64: bool = False) -> bytes:
+    """
+    Gera um ZIP com membros deflate (CSVs) e armazenados (imagens).
+
+    Args:
+        members: Nome e conteúdo de cada membro
+        descriptors: Gravar em fluxo, com data descriptors após cada membro
+        zip64: Forçar cabeçalhos locais ZIP64 (requer descriptors)
+
+    Returns:
+        Bytes do arquivo ZIP
+    """
+    buffer = io.BytesIO()
+    target = _UnseekableWriter(buffer) if descriptors else buffer
+    with zipfile.ZipFile(target, 'w') as archive:
+        for name, data in members.items():
+            method = zipfile.ZIP_STORED if name.endswith('.jpg') else zipfile.ZIP_DEFLATED
+            if descriptors:
+                info = zipfile.ZipInfo(name)
+                info.compress_type = method
+                with archive.open(info, 'w', force_zip64=zip64) as member:
+                    member.write(data)
+            else:
+                archive.writestr(name, data, compress_type=method)
+    return buffer.getvalue()
+
+
+class ArchiveServer:
+    """
+    Servidor HTTP local (ThreadingHTTPServer) que serve arquivos em memória.
+    """
+
+    def __init__(self, ranges: bool = True, redirect_to: Optional[str] = None):
+        """
+        Inicializa o servidor em uma porta livre.
+
+        Args:
+            ranges: Se o servidor aceita requisições Range
+            redirect_to: URL base para onde todas as requisições são redirecionadas
+        """
+        self.files: Dict[str, bytes] = {}
+        self.ranges = ranges
+        self.redirect_to = redirect_to
+        self.authorization: List[Optional[str]] = []
+        self.fail_after: Optional[int] = None
+        self.requests = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'ArchiveServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path: str) -> str:
+        """URL de um arquivo servido."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/{path}"
+
+    def interrupt_after(self, requests: Optional[int]) -> None:
+        """Responde 403 a todas as requisições GET após as primeiras n."""
+        with self._lock:
+            self.fail_after = requests
+            self.requests = 0
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_HEAD(self) -> None:
+                data = self._file()
+                if data is not None:
+                    self._send_headers(200, len(data), data)
+
+            def do_GET(self) -> None:
+                data = self._file()
+                if data is None:
+                    return
+
+                with server._lock:
+                    server.requests += 1
+                    failed = server.fail_after is not None and server.requests > server.fail_after
+                if failed:
+                    self.send_error(403)
+                    return
+
+                first, last = self._range(len(data))
+                if first is None:
+                    body = data
+                    self._send_headers(200, len(body), data)
+                else:
+                    body = data[first:last + 1]
+                    self._send_headers(206, len(body), data,
+                                       content_range=f"bytes {first}-{last}/{len(data)}")
+
+                with server._lock:
+                    server.bytes_served += len(body)
+                self.wfile.write(body)
+
+            def _file(self) -> Optional[bytes]:
+                with server._lock:
+                    server.authorization.append(self.headers.get('Authorization'))
+
+                if server.redirect_to is not None:
+                    self.send_response(302)
+                    self.send_header('Location', f"{server.redirect_to}{self.path}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return None
+
+                data = server.files.get(self.path.lstrip('/'))
+                if data is None:
+                    self.send_error(404)
+                return data
+
+            def _range(self, size: int) -> Tuple[Optional[int], Optional[int]]:
+                header = self.headers.get('Range')
+                match = re.fullmatch(r'bytes=(\d+)-(\d*)', header or '')
+                if not server.ranges or match is None:
+                    return None, None
+                first = int(match.group(1))
+                last = int(match.group(2)) if match.group(2) else size - 1
+                return first, min(last, size - 1)
+
+            def _send_headers(self, status: int, length: int, data: bytes,
+                              content_range: Optional[str] = None) -> None:
+                self.send_response(status)
+                self.send_header('Content-Length', str(length))
+                self.send_header('ETag', f'"{hashlib.md5(data).hexdigest()}"')
+                if server.ranges:
+                    self.send_header('Accept-Ranges', 'bytes')
+                if content_range:
+                    self.send_header('Content-Range', content_range)
+                self.end_headers()
+
+        return Handler
@@ -0,0 +1,213 @@
+"""
+Testes do módulo de aquisição contra um servidor HTTP local.
+
+Executar com: python -m unittest discover tests
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from typing import Optional
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from archive_server import ArchiveServer, make_members, make_zip
+from data.acquisition import (ArchiveAcquirer, ChecksumError, ParallelDownloader,
+                              END_OF_ARCHIVE_MAX_SIZE)
+
+CSV_MEMBERS = ['articles.csv', 'customers.csv', 'transactions_train.csv']
+
+
+def include_csv(name: str) -> bool:
+    return name in CSV_MEMBERS
+
+
+class AcquisitionTestCase(unittest.TestCase):
+    """Base: servidor local com ZIPs com e sem data descriptors."""
+
+    ranges = True
+
+    def setUp(self):
+        self.members = make_members()
+        self.archives = {'plain.zip': make_zip(self.members),
+                         'descriptors.zip': make_zip(self.members, descriptors=True)}
+        self.server = ArchiveServer(ranges=self.ranges).__enter__()
+        self.server.files.update(self.archives)
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.target_dir)
+
+    def acquire(self, name: str, server: Optional[ArchiveServer] = None,
+                auth: Optional[tuple] = None, **kwargs):
+        downloader = ParallelDownloader(workers=3, chunk_size=16 * 1024, auth=auth)
+        url = (server or self.server).url(name)
+        return ArchiveAcquirer(downloader).acquire(url, self.target_dir, **kwargs)
+
+    def assertExtracted(self, names):
+        for name in names:
+            with open(os.path.join(self.target_dir, name), 'rb') as f:
+                self.assertEqual(f.read(), self.members[name], name)
+
+    def assertNoPartialFiles(self):
+        for root, _, files in os.walk(self.target_dir):
+            self.assertEqual([name for name in files if name.endswith('.partial')], [], root)
+
+
+class TestFullDownload(AcquisitionTestCase):
+
+    def test_sha256_match(self):
+        for name, data in self.archives.items():
+            with self.subTest(archive=name):
+                shutil.rmtree(self.target_dir)
+                result = self.acquire(name, sha256=hashlib.sha256(data).hexdigest())
+
+                self.assertTrue(result['sha256_verified'])
+                self.assertEqual(result['members'], len(self.members))
+                self.assertEqual(result['bytes'], len(data))
+                self.assertExtracted(self.members)
+                self.assertNoPartialFiles()
+
+    def test_completed_download_is_skipped(self):
+        self.acquire('plain.zip', sha256=hashlib.sha256(self.archives['plain.zip']).hexdigest())
+        result = self.acquire('plain.zip', sha256=hashlib.sha256(self.archives['plain.zip']).hexdigest())
+        self.assertEqual(result['members'], 0)
+
+    def test_sha256_mismatch_keeps_existing_files(self):
+        with open(os.path.join(self.target_dir, 'articles.csv'), 'w') as f:
+            f.write('old')
+
+        with self.assertRaises(ChecksumError):
+            self.acquire('plain.zip', sha256='0' * 64, include=include_csv)
+
+        self.assertEqual(sorted(os.listdir(self.target_dir)), ['articles.csv'])
+        with open(os.path.join(self.target_dir, 'articles.csv')) as f:
+            self.assertEqual(f.read(), 'old')
+
+    def test_resume_after_interrupted_member(self):
+        for name, data in self.archives.items():
+            with self.subTest(archive=name):
+                shutil.rmtree(self.target_dir)
+                sha256 = hashlib.sha256(data).hexdigest()
+
+                # Interromper no meio do segundo membro (customers.csv)
+                self.server.interrupt_after(len(self.members['articles.csv']) // (16 * 1024) + 3)
+                with self.assertRaises(Exception):
+                    self.acquire(name, sha256=sha256)
+                self.assertFalse(os.path.exists(os.path.join(self.target_dir, 'articles.csv')))
+
+                self.server.interrupt_after(None)
+                result = self.acquire(name, sha256=sha256)
+
+                self.assertTrue(result['resumed'])
+                self.assertLess(result['bytes'], len(data))
+                self.assertExtracted(self.members)
+                self.assertNoPartialFiles()
+
+
+class TestSelectiveDownload(AcquisitionTestCase):
+
+    def test_downloads_only_selected_members(self):
+        for name, data in self.archives.items():
+            with self.subTest(archive=name):
+                shutil.rmtree(self.target_dir)
+                self.server.bytes_served = 0
+                result = self.acquire(name, include=include_csv)
+
+                self.assertEqual(result['members'], len(CSV_MEMBERS))
+                self.assertExtracted(CSV_MEMBERS)
+                self.assertFalse(os.path.exists(os.path.join(self.target_dir, 'images')))
+
+                # Apenas o fim do arquivo (diretório central) e os CSVs
+                images = sum(len(self.members[member]) for member in self.members
+                             if member.endswith('.jpg'))
+                self.assertLess(result['bytes'], len(data) - images)
+                self.assertLess(self.server.bytes_served,
+                                len(data) - images + END_OF_ARCHIVE_MAX_SIZE)
+
+    def test_zip64_central_directory(self):
+        with mock.patch.object(zipfile, 'ZIP64_LIMIT', 1024):
+            self.server.files['zip64.zip'] = make_zip(self.members, descriptors=True, zip64=True)
+
+        result = self.acquire('zip64.zip', include=include_csv)
+
+        self.assertEqual(result['members'], len(CSV_MEMBERS))
+        self.assertExtracted(CSV_MEMBERS)
+
+    def test_resume_after_interrupted_member(self):
+        self.server.interrupt_after(len(self.members['articles.csv']) // (16 * 1024) + 3)
+        with self.assertRaises(Exception):
+            self.acquire('plain.zip', include=include_csv)
+
+        self.server.interrupt_after(None)
+        result = self.acquire('plain.zip', include=include_csv)
+
+        self.assertTrue(result['resumed'])
+        self.assertLess(result['members'], len(CSV_MEMBERS))
+        self.assertExtracted(CSV_MEMBERS)
+        self.assertNoPartialFiles()
+
+
+class TestRedirect(AcquisitionTestCase):
+    """API com credenciais que redireciona para o servidor do arquivo."""
+
+    def setUp(self):
+        super().setUp()
+        self.api = ArchiveServer(redirect_to=self.server.url('').rstrip('/')).__enter__()
+
+    def tearDown(self):
+        self.api.__exit__(None, None, None)
+        super().tearDown()
+
+    def test_credentials_not_sent_to_redirected_host(self):
+        for mode in [{'include': include_csv},
+                     {'sha256': hashlib.sha256(self.archives['plain.zip']).hexdigest()}]:
+            with self.subTest(mode=next(iter(mode))):
+                shutil.rmtree(self.target_dir)
+                self.server.authorization.clear()
+                self.acquire('plain.zip', server=self.api, auth=('user', 'SECRETKEY'), **mode)
+
+                self.assertExtracted(CSV_MEMBERS)
+                self.assertTrue(self.api.authorization)
+                self.assertTrue(all(header and header.startswith('Basic ')
+                                    for header in self.api.authorization))
+                self.assertTrue(self.server.authorization)
+                self.assertEqual(set(self.server.authorization), {None})
+
+
+class TestServerWithoutRange(AcquisitionTestCase):
+
+    ranges = False
+
+    def test_single_stream_download(self):
+        for name, data in self.archives.items():
+            with self.subTest(archive=name):
+                shutil.rmtree(self.target_dir)
+                result = self.acquire(name, sha256=hashlib.sha256(data).hexdigest(),
+                                      include=include_csv)
+
+                self.assertTrue(result['sha256_verified'])
+                self.assertExtracted(CSV_MEMBERS)
+                self.assertFalse(os.path.exists(os.path.join(self.target_dir, 'images')))
+
+    def test_interrupted_download_restarts(self):
+        self.server.interrupt_after(0)
+        with self.assertRaises(Exception):
+            self.acquire('plain.zip', include=include_csv)
+
+        self.server.interrupt_after(None)
+        result = self.acquire('plain.zip', include=include_csv)
+
+        self.assertFalse(result['resumed'])
+        self.assertExtracted(CSV_MEMBERS)
+
+
+if __name__ == '__main__':
+    unittest.main()